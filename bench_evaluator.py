@@ -0,0 +1,1474 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for evaluator.py
+Builds synthetic trees and git repos in a temp dir and times the evaluator as they grow
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import shutil
+import tempfile
+import argparse
+import sqlite3
+import threading
+import subprocess
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+import evaluator
+import coverage_reports
+
+def build_tree(root, src_files, node_modules_files):
+    """Create a synthetic project with source files and a heavy node_modules."""
+    exts = ['.js', '.py', '.go', '.rs', '.java', '.c', '.css', '.md']
+    for i in range(src_files):
+        d = os.path.join(root, 'src', f'pkg{i // 50}')
+        os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, f'module{i}{exts[i % len(exts)]}'), 'w') as f:
+            f.write('x\n')
+    for i in range(node_modules_files):
+        d = os.path.join(root, 'node_modules', f'dep{i // 100}', 'lib')
+        os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, f'index{i}.js'), 'w') as f:
+            f.write('x\n')
+    with open(os.path.join(root, 'README.md'), 'w') as f:
+        f.write('# synthetic\n')
+
+GIT_IDENTITY = dict(os.environ, GIT_AUTHOR_NAME='bench', GIT_AUTHOR_EMAIL='bench@example.com',
+                    GIT_COMMITTER_NAME='bench', GIT_COMMITTER_EMAIL='bench@example.com')
+
+def git_commit_all(root):
+    """Turn a synthetic tree into a git repo with everything committed."""
+    for cmd in (['git', 'init', '-q'], ['git', 'add', '-A', '-f'], ['git', 'commit', '-q', '-m', 'synthetic']):
+        subprocess.run(cmd, cwd=root, env=GIT_IDENTITY, check=True, stdout=subprocess.DEVNULL)
+
+def build_history(root, commits, authors, files=50):
+    """Create a git repo with a linear history via fast-import, without touching the network."""
+    subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+    stream = []
+    for i in range(commits):
+        author = f"author{(i * 7919) % authors}"
+        when = 1500000000 + i * 3600
+        message = f"commit {i}"
+        stream.append(f"commit refs/heads/master\n"
+                      f"author {author} <{author}@example.com> {when} +0000\n"
+                      f"committer {author} <{author}@example.com> {when} +0000\n"
+                      f"data {len(message)}\n{message}\n"
+                      f"M 644 inline src/file{i % files}.py\ndata 2\nx\n\n")
+    subprocess.run(['git', 'fast-import', '--quiet'], cwd=root, input=''.join(stream).encode(), check=True)
+    subprocess.run(['git', 'checkout', '-q', '-f', 'master'], cwd=root, check=True)
+
+SYNTHETIC_EPOCH = 1500000000
+README_WORDS = b'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor '
+
+def _blob(data):
+    return b'data %d\n%s\n' % (len(data), data)
+
+def build_synthetic_repo(root, commits=1000, authors=10, files=500, node_modules_depth=0,
+                         readme_bytes=4096, bare=False):
+    """Create a deterministic git repo offline: same parameters, same commit SHAs.
+
+    The first commit adds `files` source files, a README of `readme_bytes`
+    and, when `node_modules_depth` > 0, a chain of nested packages that deep
+    with a few files each; every later commit edits one source file. The
+    fast-import stream is piped to git, so a million commits never sit in
+    memory. With `bare`, `root` becomes a bare repository instead of a checkout.
+    """
+    env = dict(os.environ, GIT_COMMITTER_NAME='bench', GIT_COMMITTER_EMAIL='bench@example.com')
+    subprocess.run(['git', 'init', '-q'] + (['--bare'] if bare else []), cwd=root, check=True, env=env)
+    exts = ['.js', '.py', '.go', '.rs', '.java', '.c', '.css', '.md']
+    proc = subprocess.Popen(['git', 'fast-import', '--quiet'], cwd=root, stdin=subprocess.PIPE, env=env)
+    out = proc.stdin
+    out.write(b'blob\nmark :1\n' + _blob(b'x'))
+    readme = (README_WORDS * (readme_bytes // len(README_WORDS) + 1))[:readme_bytes]
+    out.write(b'blob\nmark :2\n' + _blob(readme))
+    for i in range(commits):
+        author = f"author{(i * 7919) % authors}".encode()
+        when = SYNTHETIC_EPOCH + i * 3600
+        ident = b'%s <%s@example.com> %d +0000\n' % (author, author, when)
+        out.write(b'commit refs/heads/master\nauthor ' + ident + b'committer ' + ident + _blob(b'commit %d' % i))
+        if i == 0:
+            out.write(b'M 644 :2 README.md\n')
+            for j in range(files):
+                out.write(b'M 644 :1 src/pkg%d/module%d%s\n' % (j // 50, j, exts[j % len(exts)].encode()))
+            nested = 'node_modules'
+            for depth in range(node_modules_depth):
+                nested += f'/dep{depth}'
+                for k in range(10):
+                    out.write(b'M 644 :1 %s/index%d.js\n' % (nested.encode(), k))
+                nested += '/node_modules'
+        else:
+            out.write(b'M 644 inline src/pkg0/module0.js\n' + _blob(b'%d' % i))
+        out.write(b'\n')
+    out.close()
+    if proc.wait() != 0:
+        raise RuntimeError('git fast-import failed')
+    if bare:
+        subprocess.run(['git', 'symbolic-ref', 'HEAD', 'refs/heads/master'], cwd=root, check=True)
+    else:
+        subprocess.run(['git', 'checkout', '-q', '-f', 'master'], cwd=root, check=True)
+
+# Each case varies one dimension of SYNTHETIC_BASE
+SYNTHETIC_BASE = {'commits': 1000, 'authors': 10, 'files': 500, 'node_modules_depth': 0, 'readme_bytes': 4096}
+SYNTHETIC_AXES = {
+    'commits': [10, 1000, 10000, 100000, 1000000],
+    'authors': [1, 100, 10000],
+    'files': [100, 10000, 50000],
+    'node_modules_depth': [4, 16],
+    'readme_bytes': [1 << 10, 1 << 20, 16 << 20]
+}
+
+def synthetic_cases(max_commits=None):
+    """Distinct parameter sets for the synthetic suite, base case first."""
+    cases = [dict(SYNTHETIC_BASE)]
+    for axis, values in SYNTHETIC_AXES.items():
+        for value in values:
+            case = dict(SYNTHETIC_BASE, **{axis: value})
+            if case not in cases and (max_commits is None or case['commits'] <= max_commits):
+                cases.append(case)
+    return cases
+
+def bench_synthetic(cases, repeat):
+    """Time each evaluator entry point on a freshly generated repo per case."""
+    functions = {
+        'get_git_info': evaluator.get_git_info,
+        'analyze_codebase': evaluator.analyze_codebase,
+        'detect_portfolio': evaluator.detect_portfolio,
+        'evaluate_repo': evaluator.evaluate_repo
+    }
+    results = []
+    for case in cases:
+        root = tempfile.mkdtemp(prefix='evalbench-')
+        try:
+            start = time.perf_counter()
+            build_synthetic_repo(root, **case)
+            result = dict(case, build_s=time.perf_counter() - start)
+            for name, fn in functions.items():
+                result[f'{name}_s'] = best_of(lambda: fn(root), repeat)
+            results.append(result)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+PARITY_LAYOUTS = {
+    'flat': ['main.py', 'README.md', 'LICENSE', 'util.go'],
+    'nested': ['src/a/b/c/deep.rs', 'src/a/index.tsx', 'docs/readme.txt', 'lib/x.h'],
+    'tests': ['src/app.spec.js', 'pkg/__tests__/x.js', 'tests/conftest.py', 'Test_Main.java'],
+    'pruned': ['node_modules/dep/test.js', 'dist/bundle.js', 'build/LICENSE', 'venv/lib/x.py',
+               '.github/workflows/ci.yml', '.hidden/readme.md', 'keep.c'],
+    'dotfiles': ['.eslintrc.js', '.license', 'src/.env', 'src/app.go'],
+    'unicode': ['src/über.py', 'docs/RÉADME.md', 'sp ace/te st.rs']
+}
+
+def check_parity():
+    """Build each layout as a committed repo and compare the git, tree and walk engines."""
+    failures = 0
+    for name, files in PARITY_LAYOUTS.items():
+        root = tempfile.mkdtemp(prefix='evalparity-')
+        try:
+            for rel in files:
+                path = os.path.join(root, rel)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as f:
+                    f.write('x\n')
+            git_commit_all(root)
+            walked = evaluator.scan_tree(root)
+            indexed = evaluator.scan_index(root)
+            committed = evaluator.scan_commit(root)
+            cache = evaluator.MemoryCache()
+            merkle = [evaluator.scan_tree_objects(root, 'HEAD', cache) for _ in range(2)]
+            ok = walked == indexed == committed == merkle[0] == merkle[1]
+            failures += not ok
+            print(f"{'ok' if ok else 'MISMATCH':>8}  {name}")
+            if not ok:
+                print(f"          walk:  {walked}\n          index: {indexed}\n          tree:  {committed}\n"
+                      f"          subtrees: {merkle}")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    # Before the first `git add` the index is empty, and outside a repository
+    # there is no tree: both engines fall back to walking the files
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    try:
+        for rel in PARITY_LAYOUTS['flat']:
+            with open(os.path.join(root, rel), 'w') as f:
+                f.write('x\n')
+        plain = {engine: evaluator.analyze_codebase(root, engine=engine) for engine in ('git', 'tree', 'walk')}
+        subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+        unstaged = evaluator.analyze_codebase(root)
+        ok = plain['git'] == plain['tree'] == plain['walk'] == unstaged and unstaged['file_count'] == 4
+        failures += not ok
+        print(f"{'ok' if ok else 'MISMATCH':>8}  unstaged")
+        if not ok:
+            print(f"          not a repo: {plain}\n          unstaged:   {unstaged}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return failures
+
+# Histories as (branch, parents, author, date) commits, with the expected
+# UTC first/last dates and the earliest root date. Dates are git's raw
+# "<unix> <tz>" format.
+DATE_HISTORIES = {
+    'multi_root': ([
+        ('a', [], 'alice', '1556668800 +0000'),        # 2019-05-01
+        ('b', [], 'bob', '1488326400 +0000'),          # 2017-03-01, second root
+        ('master', [0, 1], 'alice', '1577836800 +0000')  # 2020-01-01 merge
+    ], ('2017-03-01', '2020-01-01', '2017-03-01')),
+    'clock_skew': ([
+        ('master', [], 'alice', '1590969600 +0000'),   # 2020-06-01 root
+        ('master', [0], 'bob', '2051222400 +0000'),    # 2035-01-01, clock in the future
+        ('master', [1], 'carol', '1546300800 +0000'),  # 2019-01-01, older than the root
+        ('master', [2], 'alice', '1612137600 +0000')   # 2021-02-01 head
+    ], ('2019-01-01', '2035-01-01', '2020-06-01')),
+    'timezones': ([
+        # 2021-02-02 23:30 at -10:00 is 2021-02-03 09:30 UTC
+        ('master', [], 'alice', '1612344600 -1000'),
+        # 2021-02-03 01:00 at +14:00 is 2021-02-02 11:00 UTC, the earlier instant
+        ('master', [0], 'bob', '1612263600 +1400')
+    ], ('2021-02-02', '2021-02-03', '2021-02-03'))
+}
+
+def build_dated_history(root, commits):
+    """fast-import a history given as (branch, parent indexes, author, raw date) tuples."""
+    subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+    stream = []
+    for i, (branch, parents, author, date) in enumerate(commits):
+        stream.append(f"commit refs/heads/{branch}\nmark :{i + 1}\n"
+                      f"author {author} <{author}@example.com> {date}\n"
+                      f"committer {author} <{author}@example.com> {date}\n"
+                      f"data 1\n{i}\n")
+        for n, parent in enumerate(parents):
+            stream.append(f"{'from' if n == 0 else 'merge'} :{parent + 1}\n")
+        stream.append(f"M 644 inline file{i}.txt\ndata 1\n{i}\n\n")
+    subprocess.run(['git', 'fast-import', '--quiet'], cwd=root, input=''.join(stream).encode(), check=True)
+    subprocess.run(['git', 'checkout', '-q', '-f', 'master'], cwd=root, check=True)
+
+# (branch, parent indexes, author, days after SYNTHETIC_EPOCH, {path: content, or None to delete}).
+# The side branch brings the second author in only at the merge; the
+# .evaluatorignore edits force a relist, deletions and a gitlink move the counts.
+HISTORY_COMMITS = [
+    ('master', [], 'alice', 0, {'README.md': '# app\n', 'src/a.py': 'x'}),
+    ('master', [0], 'alice', 40, {'tests/test_a.py': 'x', 'LICENSE': 'MIT'}),
+    ('side', [1], 'carol', 50, {'src/side.go': 'x'}),
+    ('master', [1], 'alice', 80, {'src/a.py': None, '.evaluatorignore': 'src/vendor/\n', 'src/vendor/x.c': 'x'}),
+    ('master', [3, 2], 'alice', 120, {'src/side.go': 'x'}),
+    ('master', [4], 'alice', 160, {'.github/workflows/ci.yml': 'on: push', 'package.json': '{"name": "my-portfolio"}'}),
+    ('master', [5], 'bob', 200, {'.evaluatorignore': '', 'lib/dep': 'gitlink'}),
+    ('master', [6], 'alice', 240, {f'src/m{i}.rs': 'x' for i in range(25)}),
+    ('master', [7], 'alice', 241, {'tests/test_a.py': None, 'lib/dep': None, 'README.md': 'my portfolio'})
+]
+
+def build_file_history(root, commits):
+    """fast-import HISTORY_COMMITS-style tuples; a 'gitlink' content becomes a submodule entry."""
+    subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+    stream = []
+    for i, (branch, parents, author, days, changes) in enumerate(commits):
+        date = f"{SYNTHETIC_EPOCH + days * 86400} +0000"
+        stream.append(f"commit refs/heads/{branch}\nmark :{i + 1}\n"
+                      f"author {author} <{author}@example.com> {date}\n"
+                      f"committer {author} <{author}@example.com> {date}\n"
+                      f"data 1\n{i}\n")
+        for n, parent in enumerate(parents):
+            stream.append(f"{'from' if n == 0 else 'merge'} :{parent + 1}\n")
+        for path, content in changes.items():
+            if content is None:
+                stream.append(f"D {path}\n")
+            elif content == 'gitlink':
+                stream.append(f"M 160000 {'1' * 40} {path}\n")
+            else:
+                stream.append(f"M 644 inline {path}\ndata {len(content)}\n{content}\n")
+        stream.append('\n')
+    subprocess.run(['git', 'fast-import', '--quiet'], cwd=root, input=''.join(stream).encode(), check=True)
+    subprocess.run(['git', 'symbolic-ref', 'HEAD', 'refs/heads/master'], cwd=root, check=True)
+
+def check_history():
+    """Every snapshot of evaluate_history against evaluate_repo at that commit, scored as of its date."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    try:
+        build_file_history(root, HISTORY_COMMITS)
+        failures = 0
+        for label, monthly, count in (('history', False, 20), ('history:monthly', True, 4)):
+            series = evaluator.evaluate_history(root, count=count, monthly=monthly)['series']
+            expected = []
+            for point in series:
+                details = evaluator.evaluate_repo(root, ref=point['commit'])['details']
+                details['as_of'] = point['date']
+                expected.append(evaluator.calculate_score(details, {}))
+            scores = [point['score'] for point in series]
+            ok = scores == expected and len(series) == (4 if monthly else 8) and (monthly or len(set(scores)) > 3)
+            failures += not ok
+            print(f"{'ok' if ok else 'MISMATCH':>8}  {label}")
+            if not ok:
+                print(f"          history:  {scores}\n          evaluate: {expected}")
+        return failures
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def commit_date_of_head(commits):
+    return evaluator.commit_date(int(commits[-1][3].split()[0]))
+
+def check_dates():
+    """First/last commit dates for multiple roots, clock skew and timezones, in every mode."""
+    failures = 0
+    for name, (commits, expected) in DATE_HISTORIES.items():
+        root = tempfile.mkdtemp(prefix='evalparity-')
+        try:
+            build_dated_history(root, commits)
+            exact = evaluator.get_git_info(root)
+            got = (exact['first_commit_date'], exact['last_commit_date'])
+            problems = [f"exact {got} != {expected[:2]}"] if got != expected[:2] else []
+            # Threshold mode stops after the first author, so the oldest date
+            # comes from the root query: under clock skew that is the root's
+            # date, not an older-dated descendant's
+            early = evaluator.get_git_info(root, contributors='threshold', contributor_threshold=1)
+            if early['first_commit_date'] != min(expected[2], commit_date_of_head(commits)) \
+                    or early['commit_count'] != len(commits):
+                problems.append(f"threshold first={early['first_commit_date']} count={early['commit_count']}")
+            failures += bool(problems)
+            print(f"{'ok' if not problems else 'MISMATCH':>8}  dates:{name}")
+            for problem in problems:
+                print(f"          {problem}")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return failures
+
+# Shell-free git steps applied to a one-commit repo before comparing
+# read_remote_refs with `git branch -r`
+REF_LAYOUTS = {
+    'none': [],
+    'loose': [['update-ref', 'refs/remotes/origin/main', 'HEAD'],
+              ['update-ref', 'refs/remotes/origin/feature/x', 'HEAD'],
+              ['update-ref', 'refs/remotes/upstream/dev', 'HEAD']],
+    'packed': [['update-ref', 'refs/remotes/origin/main', 'HEAD'],
+               ['update-ref', 'refs/remotes/origin/feature/x', 'HEAD'],
+               ['tag', '-a', '-m', 'peeled', 'v1'],
+               ['pack-refs', '--all']],
+    'mixed': [['update-ref', 'refs/remotes/origin/main', 'HEAD'],
+              ['update-ref', 'refs/remotes/origin/old', 'HEAD'],
+              ['pack-refs', '--all'],
+              ['update-ref', 'refs/remotes/origin/new', 'HEAD'],
+              ['update-ref', '-d', 'refs/remotes/origin/old']],
+    'symref': [['update-ref', 'refs/remotes/origin/main', 'HEAD'],
+               ['pack-refs', '--all'],
+               ['symbolic-ref', 'refs/remotes/origin/HEAD', 'refs/remotes/origin/main']],
+    'unicode': [['update-ref', 'refs/remotes/origin/über', 'HEAD'],
+                ['update-ref', 'refs/remotes/origin/Zeta', 'HEAD'],
+                ['update-ref', 'refs/remotes/origin/alpha', 'HEAD']],
+    'dangling': [['update-ref', 'refs/remotes/origin/main', 'HEAD'],
+                 ['symbolic-ref', 'refs/remotes/origin/HEAD', 'refs/remotes/origin/gone']],
+    'outside': [['update-ref', 'refs/remotes/origin/main', 'HEAD'],
+                ['symbolic-ref', 'refs/remotes/origin/HEAD', 'refs/heads/master']]
+}
+
+# Symrefs git prints differently (dropped, or named outside refs/remotes):
+# the reader declines them and get_git_info falls back to `git branch -r`
+FALLBACK_LAYOUTS = ('dangling', 'outside')
+
+def git_branch_remotes(root):
+    out = subprocess.run(['git', 'branch', '-r'], cwd=root, capture_output=True, text=True, check=True).stdout
+    return [line.strip() for line in out.split('\n') if line.strip()]
+
+def check_refs():
+    """Compare the pure-Python remote ref reader with `git branch -r`, and the fallback to git where it declines."""
+    failures = 0
+    for name, steps in REF_LAYOUTS.items():
+        root = tempfile.mkdtemp(prefix='evalparity-')
+        try:
+            build_tree(root, 1, 0)
+            git_commit_all(root)
+            for step in steps:
+                subprocess.run(['git'] + step, cwd=root, env=GIT_IDENTITY, check=True, stdout=subprocess.DEVNULL)
+            got = evaluator.read_remote_refs(root)
+            if name in FALLBACK_LAYOUTS:
+                declined = got is None
+                failures += not declined
+                print(f"{'ok' if declined else 'MISMATCH':>8}  refs:{name}:declined")
+                got = evaluator.get_git_info(root)['branches']
+            checks = [(name, root, got)]
+            if name == 'symref':
+                # A linked worktree's .git file leads the reader to the main repository's refs
+                worktree = os.path.join(root, 'wt')
+                subprocess.run(['git', 'worktree', 'add', '-q', worktree], cwd=root, check=True)
+                checks.append((f'{name}+worktree', worktree, evaluator.read_remote_refs(worktree)))
+            for label, path, got in checks:
+                expected = git_branch_remotes(path)
+                ok = got == expected
+                failures += not ok
+                print(f"{'ok' if ok else 'MISMATCH':>8}  refs:{label}")
+                if not ok:
+                    print(f"          reader: {got}\n          git:    {expected}")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return failures
+
+IGNORE_LAYOUT = {
+    '.gitignore': 'coverage/\n/target\n*.log\n!keep.log\nbuild-*/\n**/gen/**\ndocs/*.md\n# comment\n\\#hash.py\n'
+                  # Malformed or unusual character classes: git skips the first four and keeps the rest
+                  '[]\n[!]\nx[\n[[:bogus:]]\n[z-a]*.py\n[[:digit:]]*.go\n[!a-z]*.rs\n',
+    'src/.gitignore': '*.tmp\n!important.tmp\nlocal/\n',
+    '.evaluatorignore': 'src/vendor/\n[z-a\n',
+    '.git/info/exclude': 'secret.py\n',
+    'files': ['coverage/lcov.info', 'target/app.java', 'src/target/keep.rs', 'a.log', 'keep.log',
+              'build-1/out.js', 'src/gen/x.py', 'gen/deep/y.py', 'docs/a.md', 'docs/sub/b.go',
+              'src/a.tmp', 'src/important.tmp', 'src/local/z.go', 'src/main.go', 'README.md',
+              'my file.py', '#hash.py', 'secret.py', 'src/secret.py', 'src/vendor/lib.c', 'vendor2/lib.c',
+              'zed.py', 'abc.py', '7.go', 'x.go', 'Main.rs', 'lib.rs']
+}
+
+def check_ignore():
+    """Walk with ignore files vs the index built by a plain `git add -A`, which applies the same rules."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    try:
+        subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+        for rel in IGNORE_LAYOUT['files'] + ['.gitignore', 'src/.gitignore', '.evaluatorignore', '.git/info/exclude']:
+            path = os.path.join(root, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(IGNORE_LAYOUT.get(rel, 'x\n'))
+        for cmd in (['git', 'add', '-A'], ['git', 'commit', '-q', '-m', 'ignore']):
+            subprocess.run(cmd, cwd=root, env=GIT_IDENTITY, check=True, stdout=subprocess.DEVNULL)
+        walked = evaluator.scan_tree(root)
+        indexed = evaluator.scan_index(root)
+        merkle = evaluator.scan_tree_objects(root, 'HEAD', evaluator.MemoryCache())
+        # Counted: src/target/keep.rs keep.log docs/sub/b.go src/important.tmp src/main.go
+        # README.md "my file.py" vendor2/lib.c abc.py x.go lib.rs
+        ok = walked == indexed == merkle and walked['file_count'] == 11
+        print(f"{'ok' if ok else 'MISMATCH':>8}  ignore")
+        if not ok:
+            print(f"          walk:  {walked}\n          index: {indexed}")
+        return int(not ok)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+FILE_KEYS = ('file_count', 'languages', 'has_tests', 'readme_exists', 'license_exists')
+
+def check_rescan():
+    """Cached walks that relist only changed directories vs a fresh scan_tree, and cache eviction."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    try:
+        tree = os.path.join(root, 'tree')
+        build_tree(tree, 200, 0)
+        past = time.time() - 3600
+        for dirpath, _, _ in os.walk(tree):
+            os.utime(dirpath, (past, past))
+        cache = evaluator.EvaluationCache(os.path.join(root, 'cache'))
+        edited = os.path.join(tree, 'src', 'pkg2')
+
+        def run():
+            result = evaluator.evaluate_repo(tree, cache=cache, engine='walk', profile=True)
+            fresh = evaluator.scan_tree(tree)
+            return (all(result['details'][key] == fresh[key] for key in FILE_KEYS),
+                    result['profile']['counters']['dirs_listed'])
+
+        failures = 0
+        _, cold = run()
+        _, warm = run()
+        steps = []
+        # An edited directory is relisted once; one touched within the last
+        # two seconds is relisted until it has been seen with an older mtime
+        with open(os.path.join(edited, 'test_new.py'), 'w') as f:
+            f.write('x\n')
+        os.remove(os.path.join(edited, 'module100.java'))
+        os.utime(edited, (past + 60, past + 60))
+        steps += [(run(), warm + 1), (run(), warm)]
+        os.rename(os.path.join(edited, 'module101.c'), os.path.join(edited, 'module101.rs'))
+        steps += [(run(), warm + 1), (run(), warm + 1)]
+        os.utime(edited, (past + 120, past + 120))
+        steps += [(run(), warm + 1), (run(), warm)]
+        ok = cold > warm and all(same and listed == expected for (same, listed), expected in steps)
+        failures += not ok
+        print(f"{'ok' if ok else 'MISMATCH':>8}  rescan")
+        if not ok:
+            print(f"          listed cold {cold}, warm {warm}; steps (matches, listed, expected): "
+                  f"{[(same, listed, expected) for (same, listed), expected in steps]}")
+
+        # Two repositories over budget keep only the newer; one alone over budget keeps nothing
+        other = os.path.join(root, 'other')
+        build_tree(other, 200, 0)
+        with closing(sqlite3.connect(cache.path)) as conn:
+            one = conn.execute('SELECT bytes FROM repos').fetchone()[0]
+        sizes = []
+        for max_bytes, paths in ((one * 3 // 2, (tree, other)), (one // 2, (tree,))):
+            small = evaluator.EvaluationCache(os.path.join(root, f"cache{max_bytes}"), max_bytes=max_bytes)
+            for path in paths:
+                evaluator.evaluate_repo(path, cache=small, engine='walk')
+            with closing(sqlite3.connect(small.path)) as conn:
+                repos = conn.execute('SELECT repo FROM repos').fetchall()
+                stored = sum(conn.execute(f'SELECT COALESCE(SUM(LENGTH(data)), 0) FROM {table}').fetchone()[0]
+                             for table in ('dirs', 'git_info', 'analysis'))
+            sizes.append((max_bytes, [repo.partition('#')[0] for repo, in repos], stored))
+        ok = (sizes[0][1] == [os.path.realpath(other)] and 0 < sizes[0][2] <= sizes[0][0]
+              and sizes[1][1] == [] and sizes[1][2] == 0)
+        failures += not ok
+        print(f"{'ok' if ok else 'MISMATCH':>8}  rescan:evict")
+        if not ok:
+            print(f"          (max_bytes, repos kept, bytes stored): {sizes}")
+        return failures
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def check_nested():
+    """A superproject with a submodule, a linked worktree and a symlink loop: both engines skip them."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    try:
+        inner, outer = os.path.join(root, 'inner'), os.path.join(root, 'outer')
+        for path, src_files in ((inner, 30), (outer, 3)):
+            os.makedirs(path)
+            build_tree(path, src_files, 0)
+            git_commit_all(path)
+        git = ['git', '-c', 'protocol.file.allow=always']
+        for cmd in (git + ['submodule', 'add', '-q', inner, 'vendor/inner'],
+                    ['git', 'commit', '-q', '-m', 'submodule'],
+                    ['git', 'worktree', 'add', '-q', 'wt']):
+            subprocess.run(cmd, cwd=outer, env=GIT_IDENTITY, check=True, stdout=subprocess.DEVNULL)
+        os.symlink('..', os.path.join(outer, 'src', 'loop'))
+        walked = evaluator.scan_tree(outer)
+        indexed = evaluator.scan_index(outer)
+        subs = evaluator.evaluate_submodules(outer)
+        ok = walked == indexed and walked['file_count'] == 4 and list(subs) == ['vendor/inner']
+        print(f"{'ok' if ok else 'MISMATCH':>8}  superproject")
+        if not ok:
+            print(f"          walk:  {walked}\n          index: {indexed}\n          submodules: {list(subs)}")
+        return int(not ok)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+CONTENT_LAYOUT = {
+    'package.json': '{"name": "site", "description": "static pages"}',
+    # The keyword sits past the first read chunk
+    'README.md': 'x' * 100000 + ' my portfolio\n',
+    '.github/workflows/ci.yml': 'on: push\n',
+    'src/components/About.jsx': '', 'src/components/Hero.jsx': '', 'src/components/Contact.jsx': ''
+}
+
+def content_signals(root, memo):
+    signals = evaluator.collect_content_signals('cheap', root, memo, None, {})
+    signals.update(evaluator.collect_content_signals('expensive', root, memo, None, {'has_tests': False}))
+    return signals
+
+def check_contents():
+    """Content signals read from the checkout vs from HEAD's objects, and from HEAD once the checkout is gone."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    try:
+        subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+        for rel, text in CONTENT_LAYOUT.items():
+            path = os.path.join(root, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(text)
+        git_commit_all(root)
+        from_disk = content_signals(root, evaluator.FileMemo(root))
+        from_objects = content_signals(root, evaluator.open_memo(root))
+        for name in os.listdir(root):
+            if name != '.git':
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+                if os.path.exists(os.path.join(root, name)):
+                    os.remove(os.path.join(root, name))
+        without_checkout = content_signals(root, evaluator.open_memo(root))
+        ok = (from_disk == from_objects == without_checkout
+              and from_disk['has_ci_cd'] and from_disk['is_portfolio'])
+        print(f"{'ok' if ok else 'MISMATCH':>8}  contents")
+        if not ok:
+            print(f"          disk:    {from_disk}\n          objects: {from_objects}\n"
+                  f"          no checkout: {without_checkout}")
+        return int(not ok)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+# Statements covered per file: 2 of 3 and 0 of 1, so 50%. The extra members
+# exercise every kind of JSON value across chunk boundaries.
+ISTANBUL_FINAL = {
+    'src/a.js': {'path': 'src/a.js', 's': {'0': 1, '1': 0, '2': 12345678901234}, 'f': {}, 'b': {'0': [0, 1]}},
+    'src/\u00e9t\u00e9 "quoted"\\b.js': {'s': {'0': 0}, 'ratio': -1.5e-3, 'ok': True, 'none': None,
+                                     'empty': {}, 'list': [], 'text': 'tab\tand \\n {not: "json"}'},
+    '\U0001f600': {}
+}
+
+# Top-level members of every JSON type, for iter_json_object alone: only a
+# top-level scalar can be cut off at a chunk boundary and still decode
+JSON_MEMBERS = ('{"int": 12345678901234, "neg": -1.5e-3, "zero": 0, "t": true, "f": false, "n": null,\n'
+                ' "s": "a \\"b\\" \\u00e9 \u00e9 \U0001f600", "o": {"k": [1, {"x": 2}]}, "a": [], "e": {},\n'
+                ' "last": 7 }\n')
+
+# One fixture per report format, each with the percent it must parse to
+COVERAGE_FIXTURES = [
+    ('lcov', 'lcov.info', 'TN:\nSF:a.c\nLF:10\nLH:7\nend_of_record\nSF:b.c\nLF:30\nLH:13\nend_of_record\n', 50.0),
+    ('cobertura', 'coverage.xml', '<?xml version="1.0" ?>\n<coverage lines-covered="3" lines-valid="4" '
+                                  'line-rate="0.1"><packages/></coverage>\n', 75.0),
+    ('cobertura', 'rate.xml', '<coverage line-rate="0.875"><packages/></coverage>\n', 87.5),
+    ('istanbul-summary', 'coverage-summary.json',
+     json.dumps({'total': {'lines': {'total': 8, 'covered': 6, 'pct': 75}}, 'a.js': {}}), 75.0),
+    ('istanbul', 'coverage-final.json', json.dumps(ISTANBUL_FINAL, indent=1, ensure_ascii=False), 50.0)
+]
+
+def check_coverage():
+    """The incremental JSON reader vs json.load at tiny chunk sizes, and one report per format."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    chunk_size = coverage_reports.CHUNK_SIZE
+    try:
+        path = os.path.join(root, 'members.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(JSON_MEMBERS)
+        streamed = {}
+        for size in (1, 2, 3, 7, 64, chunk_size):
+            coverage_reports.CHUNK_SIZE = size
+            try:
+                streamed[size] = dict(coverage_reports.iter_json_object(path))
+            except ValueError as e:
+                streamed[size] = repr(e)
+        coverage_reports.CHUNK_SIZE = chunk_size
+        ok = all(members == json.loads(JSON_MEMBERS) for members in streamed.values())
+        failures = int(not ok)
+        print(f"{'ok' if ok else 'MISMATCH':>8}  coverage:json")
+        if not ok:
+            print(f"          json.load: {json.loads(JSON_MEMBERS)}\n          streamed: {streamed}")
+        for fmt, name, text, expected in COVERAGE_FIXTURES:
+            path = os.path.join(root, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            got = coverage_reports.PARSERS[fmt](path)
+            ok = got == expected
+            if name.endswith('.json'):
+                with open(path, 'r', encoding='utf-8') as f:
+                    loaded = json.load(f)
+                for size in (1, 2, 3, 7, 64, chunk_size):
+                    coverage_reports.CHUNK_SIZE = size
+                    streamed = dict(coverage_reports.iter_json_object(path))
+                    ok = ok and streamed == loaded and coverage_reports.PARSERS[fmt](path) == expected
+                coverage_reports.CHUNK_SIZE = chunk_size
+            failures += not ok
+            print(f"{'ok' if ok else 'MISMATCH':>8}  coverage:{name}")
+            if not ok:
+                print(f"          parsed {got}, expected {expected}")
+        return failures
+    finally:
+        coverage_reports.CHUNK_SIZE = chunk_size
+        shutil.rmtree(root, ignore_errors=True)
+
+def check_daemon():
+    """evaluate_remote through an in-process daemon vs evaluate_repo, cold, warm and after a new commit."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    socket_path = os.path.join(root, 'evaluator.sock')
+    repo = os.path.join(root, 'repo')
+    server = threading.Thread(target=evaluator.serve, args=(socket_path, 4), daemon=True)
+    try:
+        os.makedirs(repo)
+        build_synthetic_repo(repo, commits=60, files=200)
+        server.start()
+        while not os.path.exists(socket_path):
+            time.sleep(0.01)
+        option_sets = [('', {}), ('warm', {}), ('scoring', {'scoring': True}),
+                       ('threshold', {'contributors': 'threshold'}), ('ref', {'ref': 'HEAD~5'}),
+                       ('walk', {'engine': 'walk', 'top_contributors': 3})]
+        failures = 0
+
+        def compare(label):
+            nonlocal failures
+            for suffix, options in option_sets:
+                remote = evaluator.evaluate_remote(repo, socket_path, **options)
+                local = evaluator.to_json(evaluator.evaluate_repo(repo, **options))
+                ok = remote == local
+                failures += not ok
+                print(f"{'ok' if ok else 'MISMATCH':>8}  daemon:{label}{':' + suffix if suffix else ''}")
+                if not ok:
+                    print(f"          daemon: {remote}\n          local:  {local}")
+
+        compare('initial')
+        with open(os.path.join(repo, 'LICENSE'), 'w') as f:
+            f.write('MIT\n')
+        git_commit_all(repo)
+        compare('committed')
+
+        # Concurrent requests are all counted, and a failed one is counted as an error
+        before = evaluator.server_stats(socket_path)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: evaluator.evaluate_remote(repo, socket_path), range(32)))
+        try:
+            evaluator._request(socket_path, {'op': 'evaluate'})
+        except RuntimeError:
+            pass
+        after = evaluator.server_stats(socket_path)
+        ok = after['requests'] - before['requests'] == 33 and after['errors'] - before['errors'] == 1
+        failures += not ok
+        print(f"{'ok' if ok else 'MISMATCH':>8}  daemon:stats")
+        if not ok:
+            print(f"          before: {before}\n          after:  {after}")
+
+        # A file that is not a socket is never taken over
+        regular = os.path.join(root, 'notes.txt')
+        with open(regular, 'w') as f:
+            f.write('keep\n')
+        try:
+            evaluator.serve(regular)
+            refused = False
+        except RuntimeError:
+            refused = True
+        ok = refused and os.path.isfile(regular)
+        failures += not ok
+        print(f"{'ok' if ok else 'MISMATCH':>8}  daemon:not-a-socket")
+        return failures
+    finally:
+        if server.is_alive():
+            evaluator._request(socket_path, {'op': 'shutdown'})
+            server.join(5)
+        shutil.rmtree(root, ignore_errors=True)
+
+# (clone flags, expected 'clone', whether the log values are estimates)
+CLONE_LAYOUTS = {
+    'full': ([], 'full', False),
+    'shallow': (['--depth', '5'], 'shallow', True),
+    'partial': (['--filter=blob:none'], 'partial', False),
+    'shallow+partial': (['--depth', '5', '--filter=blob:none'], 'shallow+partial', True)
+}
+
+def check_clones():
+    """Shallow and partial clones: detected from .git, log values marked as estimates, files unchanged."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    try:
+        source = os.path.join(root, 'source')
+        os.makedirs(source)
+        build_synthetic_repo(source, commits=60, files=200)
+        subprocess.run(['git', 'config', 'uploadpack.allowFilter', 'true'], cwd=source, check=True)
+        expected = evaluator.evaluate_repo(source)['details']
+        failures = 0
+        for name, (flags, kind, truncated) in CLONE_LAYOUTS.items():
+            clone = os.path.join(root, name)
+            subprocess.run(['git', 'clone', '-q'] + flags + [f"file://{source}", clone], check=True,
+                           stderr=subprocess.DEVNULL)
+            details = evaluator.evaluate_repo(clone)['details']
+            log_values = [key for key in evaluator.LOG_VALUES if key in details]
+            ok = (evaluator.clone_kind(clone) == ('shallow' in kind, 'partial' in kind)
+                  and details['clone'] == kind
+                  and all(details[key] == expected[key] for key in FILE_KEYS)
+                  and (details['commit_count'] == 5 if truncated else details['commit_count'] == 60))
+            if truncated:
+                ok = ok and set(log_values) <= set(details['estimated'])
+            else:
+                ok = ok and details['estimated'] == [] and all(details[key] == expected[key] for key in log_values)
+            failures += not ok
+            print(f"{'ok' if ok else 'MISMATCH':>8}  clone:{name}")
+            if not ok:
+                print(f"          clone:    {details}\n          source:   {expected}")
+        return failures
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def fork_repo(base, fork, path=None):
+    """Clone `base` bare into `fork`, sharing its objects; with `path`, add one commit creating that file."""
+    subprocess.run(['git', 'clone', '-q', '--bare', '--shared', base, fork], check=True)
+    if path is not None:
+        stream = (f"commit refs/heads/master\nauthor fork <fork@example.com> {SYNTHETIC_EPOCH} +0000\n"
+                  f"committer fork <fork@example.com> {SYNTHETIC_EPOCH} +0000\ndata 4\nfork\n"
+                  f"from refs/heads/master^0\nM 644 inline {path}\ndata 1\nx\n\n")
+        subprocess.run(['git', 'fast-import', '--quiet'], cwd=fork, input=stream.encode(), check=True)
+
+def drop_tree(base, clone, path):
+    """Clone `base` bare into `clone` with loose objects, then delete the tree at `path`."""
+    subprocess.run(['git', 'clone', '-q', '--bare', '--no-local', base, clone], check=True)
+    pack_dir = os.path.join(clone, 'objects', 'pack')
+    for name in os.listdir(pack_dir):
+        if name.endswith('.pack'):
+            with open(os.path.join(pack_dir, name), 'rb') as f:
+                data = f.read()
+            for suffix in ('.pack', '.idx', '.rev'):
+                try:
+                    os.remove(os.path.join(pack_dir, name[:-5] + suffix))
+                except FileNotFoundError:
+                    pass
+            subprocess.run(['git', 'unpack-objects', '-q'], cwd=clone, input=data, check=True)
+    oid = subprocess.run(['git', 'rev-parse', f"HEAD:{path}"], cwd=clone, capture_output=True,
+                         text=True, check=True).stdout.strip()
+    os.remove(os.path.join(clone, 'objects', oid[:2], oid[2:]))
+
+def check_fanout():
+    """A batch of identical mirrors and a fork: fanned-out records match one evaluation each.
+
+    Also scores a clone missing one subtree through a shared cache first;
+    the complete mirror must still score as if evaluated alone. Trees larger
+    than the reader's object limit must still be read whole.
+    """
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    try:
+        base = os.path.join(root, 'base.git')
+        os.makedirs(base)
+        build_synthetic_repo(base, commits=20, files=200, bare=True)
+        paths = [base]
+        for name, path in (('mirror1.git', None), ('mirror2.git', None), ('fork.git', 'src/pkg1/test_fork.py')):
+            paths.append(os.path.join(root, name))
+            fork_repo(base, paths[-1], path)
+        fanned = {record.repo_path: record.to_dict() for record in evaluator.evaluate_batch(paths, workers=2)}
+        single = {path: evaluator.EvaluationRecord.from_result(path, evaluator.evaluate_repo(path)).to_dict()
+                  for path in paths}
+        ok = fanned == single and len({evaluator.batch_tree_key(path, {}) for path in paths}) == 2
+        print(f"{'ok' if ok else 'MISMATCH':>8}  fanout")
+        if not ok:
+            for path in paths:
+                print(f"          {path}\n            batch:  {fanned[path]}\n            single: {single[path]}")
+        failures = int(not ok)
+
+        broken = os.path.join(root, 'broken.git')
+        drop_tree(base, broken, 'src/pkg1')
+        cache = evaluator.EvaluationCache(os.path.join(root, 'cache'))
+        missing = evaluator.scan_tree_objects(broken, 'HEAD', cache)
+        evaluator.evaluate_repo(broken, cache=cache)
+        shared = evaluator.scan_tree_objects(base, 'HEAD', cache)
+        alone = evaluator.scan_commit(base)
+        ok = missing is None and shared == alone
+        failures += not ok
+        print(f"{'ok' if ok else 'MISMATCH':>8}  fanout:missing-tree")
+        if not ok:
+            print(f"          broken: {missing}\n          shared: {shared}\n          alone:  {alone}")
+
+        limit = evaluator.GitObjectReader.MAX_OBJECT_BYTES
+        evaluator.GitObjectReader.MAX_OBJECT_BYTES = 100
+        try:
+            large = evaluator.scan_tree_objects(base, 'HEAD', evaluator.MemoryCache())
+            memo = evaluator.open_memo(base)
+            listing = memo.listdir('src/pkg1')
+            readme = memo.read_bytes('README.md')
+        finally:
+            evaluator.GitObjectReader.MAX_OBJECT_BYTES = limit
+        names = subprocess.run(['git', 'ls-tree', '--name-only', 'HEAD:src/pkg1'], cwd=base,
+                               capture_output=True, text=True, check=True).stdout.split()
+        ok = large == alone and listing == frozenset(names) and len(readme) == 100
+        failures += not ok
+        print(f"{'ok' if ok else 'MISMATCH':>8}  fanout:large-tree")
+        if not ok:
+            print(f"          scan: {large}\n          alone: {alone}\n          listed {len(listing)} of {len(names)}")
+        return failures
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def check_registry():
+    """One registered signal per source is collected, folded and scored; misuses are rejected."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    saved = dict(evaluator.SIGNALS), list(evaluator._LOG_FOLDS), list(evaluator._FILE_FOLDS)
+    try:
+        build_history(root, 30, 3)
+        before = evaluator.evaluate_repo(root)
+        Signal = evaluator.Signal
+        for signal in (
+                Signal('commits_folded', 'git_log', initial=0, fold=lambda n, date, author: n + 1,
+                       score=lambda d: 1 if d['commits_folded'] == d['commit_count'] else 0),
+                Signal('python_files', 'files', initial=0, fold=lambda n, name: n + name.endswith('.py'),
+                       merge=lambda a, b: a + b, score=lambda d: 1 if d['python_files'] else 0),
+                Signal('has_makefile', 'contents', default=False,
+                       collect=lambda repo_path, memo, cache: memo.exists('Makefile'),
+                       score=lambda d: 0 if d['has_makefile'] else 1),
+                Signal('python_heavy', 'contents', 'expensive', default=False,
+                       collect=lambda repo_path, memo, cache: True, needed=lambda d: d['python_files'] > 20,
+                       score=lambda d: 1 if d['python_heavy'] else 0)):
+            evaluator.register_signal(signal)
+        rejected = 0
+        for signal in (Signal('tags', 'git_refs', score=lambda d: 0),
+                       Signal('cheap_needed', 'contents', collect=lambda repo_path, memo, cache: True,
+                              needed=lambda d: d['has_tests'])):
+            try:
+                evaluator.register_signal(signal)
+            except ValueError:
+                rejected += 1
+        failures = 0
+        for label, options in (('', {}), (':tree', {'engine': 'tree', 'cache': evaluator.MemoryCache()}),
+                               (':walk', {'engine': 'walk'}), (':ref', {'ref': 'HEAD~1'})):
+            result = evaluator.evaluate_repo(root, **options)
+            details = result['details']
+            expected = {'commits_folded': details['commit_count'], 'python_files': details['file_count'],
+                        'has_makefile': False, 'python_heavy': True}
+            ok = ({name: details.get(name) for name in expected} == expected and rejected == 2
+                  and result['score'] == before['score'] + 4)
+            failures += not ok
+            print(f"{'ok' if ok else 'MISMATCH':>8}  registry{label}")
+            if not ok:
+                print(f"          expected: {expected}, 2 rejected, +4 points\n"
+                      f"          got:      {details}, {rejected} rejected, {before['score']} -> {result['score']}")
+        series = evaluator.evaluate_history(root, count=3)['series']
+        ok = len(series) == 3 and all(point['score'] > 0 for point in series)
+        failures += not ok
+        print(f"{'ok' if ok else 'MISMATCH':>8}  registry:history")
+        if not ok:
+            print(f"          series: {series}")
+        return failures
+    finally:
+        evaluator.SIGNALS.clear()
+        evaluator.SIGNALS.update(saved[0])
+        evaluator._LOG_FOLDS[:], evaluator._FILE_FOLDS[:] = saved[1], saved[2]
+        shutil.rmtree(root, ignore_errors=True)
+
+def comparable(result):
+    """An evaluate_repo result without the values that differ between a checkout and its mirror."""
+    details = {key: value for key, value in result['details'].items() if key not in ('branches', 'ref', 'commit')}
+    return result['score'], details
+
+def check_bare():
+    """A checkout vs its bare mirror, --ref vs a worktree checked out at that ref, and a linked
+    worktree's own HEAD once the main checkout has opened the shared object reader."""
+    root = tempfile.mkdtemp(prefix='evalparity-')
+    try:
+        checkout, mirror = os.path.join(root, 'checkout'), os.path.join(root, 'mirror.git')
+        os.makedirs(checkout)
+        build_history(checkout, 60, 3)
+        for rel, text in CONTENT_LAYOUT.items():
+            path = os.path.join(checkout, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(text)
+        for cmd in (['git', 'add', '-A'], ['git', 'commit', '-q', '-m', 'contents'],
+                    ['git', 'worktree', 'add', '-q', '--detach', os.path.join(root, 'old'), 'HEAD~30'],
+                    ['git', 'clone', '-q', '--mirror', checkout, mirror],
+                    ['git', 'worktree', 'add', '-q', '-b', 'side', os.path.join(root, 'side'), 'HEAD~20']):
+            subprocess.run(cmd, cwd=checkout, env=GIT_IDENTITY, check=True, stdout=subprocess.DEVNULL)
+        failures = 0
+        for label, expected, actual in (
+                ('bare', evaluator.evaluate_repo(checkout), evaluator.evaluate_repo(mirror)),
+                ('bare:ref', evaluator.evaluate_repo(os.path.join(root, 'old')),
+                 evaluator.evaluate_repo(mirror, ref='HEAD~30'))):
+            ok = comparable(expected) == comparable(actual) and actual['details']['file_count'] > 0
+            failures += not ok
+            print(f"{'ok' if ok else 'MISMATCH':>8}  {label}")
+            if not ok:
+                print(f"          checkout: {comparable(expected)}\n          bare:     {comparable(actual)}")
+        # An unborn HEAD names no commit, even where HEAD is also a file name
+        empty = os.path.join(root, 'empty.git')
+        subprocess.run(['git', 'init', '-q', '--bare', empty], check=True)
+        ok = (evaluator.read_head_sha(empty) is None and evaluator.evaluate_history(empty)['commit'] is None
+              and evaluator.evaluate_repo(empty)['details']['file_count'] == 0)
+        failures += not ok
+        print(f"{'ok' if ok else 'MISMATCH':>8}  bare:unborn")
+        if not ok:
+            print(f"          HEAD resolved to {evaluator.read_head_sha(empty)!r}")
+
+        # Names resolve in the worktree that asks, not in the one the shared reader started in
+        side = os.path.join(root, 'side')
+        evaluator.evaluate_repo(checkout, ref='HEAD')
+        expected = evaluator.evaluate_repo(mirror, ref='HEAD~20')
+        for label, actual in (('bare:worktree', evaluator.evaluate_repo(side, ref='HEAD')),
+                              ('bare:worktree-tree', evaluator.analyze_codebase(side, engine='tree',
+                                                                                cache=evaluator.MemoryCache()))):
+            details = actual.get('details', actual)
+            ok = (details['file_count'] == expected['details']['file_count'] > 0
+                  and details.get('commit', expected['details']['commit']) == expected['details']['commit'])
+            failures += not ok
+            print(f"{'ok' if ok else 'MISMATCH':>8}  {label}")
+            if not ok:
+                print(f"          expected: {comparable(expected)}\n          worktree: {details}")
+        return failures
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+LEGACY_TEST_PATTERNS = ['test', 'spec', '__tests__', 'tests']
+
+def legacy_detect_language(filename):
+    """The original if/elif language chain."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in ['.js', '.jsx', '.ts', '.tsx']:
+        return 'JavaScript/TypeScript'
+    elif ext in ['.py']:
+        return 'Python'
+    elif ext in ['.java']:
+        return 'Java'
+    elif ext in ['.cpp', '.c', '.h']:
+        return 'C/C++'
+    elif ext in ['.go']:
+        return 'Go'
+    elif ext in ['.rs']:
+        return 'Rust'
+    return None
+
+def legacy_add_file(scan, name):
+    """Per-file classification as analyze_codebase originally did it."""
+    lower = name.lower()
+    if any(pattern in lower for pattern in LEGACY_TEST_PATTERNS):
+        scan['has_tests'] = True
+    if lower.startswith('readme'):
+        scan['readme_exists'] = True
+    if lower.startswith('license'):
+        scan['license_exists'] = True
+    if not name.startswith('.'):
+        scan['file_count'] += 1
+        language = legacy_detect_language(name)
+        if language:
+            scan['languages'].add(language)
+
+def legacy_scan(repo_path):
+    """The original three-walk scan, kept here as the baseline."""
+    scan = {'has_tests': False, 'readme_exists': False, 'license_exists': False,
+            'file_count': 0, 'languages': set()}
+    for root, dirs, files in os.walk(repo_path):
+        for file in files:
+            if any(pattern in file.lower() for pattern in LEGACY_TEST_PATTERNS):
+                scan['has_tests'] = True
+                break
+        if scan['has_tests']:
+            break
+    for root, dirs, files in os.walk(repo_path):
+        for file in files:
+            if file.lower().startswith('readme'):
+                scan['readme_exists'] = True
+            if file.lower().startswith('license'):
+                scan['license_exists'] = True
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in evaluator.SKIP_DIRS]
+        for file in files:
+            if not file.startswith('.'):
+                scan['file_count'] += 1
+                language = legacy_detect_language(file)
+                if language:
+                    scan['languages'].add(language)
+    return scan
+
+def best_of(fn, repeat):
+    """Return the fastest of `repeat` timed calls, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_scan(sizes, repeat):
+    """Time legacy_scan, evaluator.scan_tree and evaluator.scan_index for each tree size."""
+    results = []
+    for src_files, node_modules_files in sizes:
+        root = tempfile.mkdtemp(prefix='evalbench-')
+        try:
+            build_tree(root, src_files, node_modules_files)
+            git_commit_all(root)
+            results.append({
+                'src_files': src_files,
+                'node_modules_files': node_modules_files,
+                'legacy_s': best_of(lambda: legacy_scan(root), repeat),
+                'scan_tree_s': best_of(lambda: evaluator.scan_tree(root), repeat),
+                'scan_index_s': best_of(lambda: evaluator.scan_index(root), repeat)
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def bench_scoring(histories, repeat):
+    """Time evaluate_repo in full and scoring mode on synthetic histories."""
+    results = []
+    for commits, authors in histories:
+        root = tempfile.mkdtemp(prefix='evalbench-')
+        try:
+            build_history(root, commits, authors)
+            full = evaluator.evaluate_repo(root)
+            scored = evaluator.evaluate_repo(root, scoring=True)
+            if full['score'] != scored['score']:
+                raise AssertionError(f"scoring mode changed the score: {full['score']} != {scored['score']}")
+            results.append({
+                'commits': commits,
+                'authors': authors,
+                'full_s': best_of(lambda: evaluator.evaluate_repo(root), repeat),
+                'scoring_s': best_of(lambda: evaluator.evaluate_repo(root, scoring=True), repeat)
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def build_ignored_outputs(root, src_files, generated_files):
+    """A project whose build writes large ignored trees: coverage/, target/ and per-package dist-*/ dirs."""
+    build_tree(root, src_files, 0)
+    for i in range(generated_files):
+        kind = ('coverage/lcov-report', 'target/classes', f'src/pkg{i % 10}/dist-out')[i % 3]
+        d = os.path.join(root, kind, f'part{i // 200}')
+        os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, f'gen{i}.js'), 'w') as f:
+            f.write('x\n')
+    with open(os.path.join(root, '.gitignore'), 'w') as f:
+        f.write('coverage/\n/target\ndist-*/\n*.log\n')
+
+def bench_ignore(sizes, repeat):
+    """Time scan_tree with and without ignore rules on trees dominated by ignored build output."""
+    results = []
+    for src_files, generated_files in sizes:
+        root = tempfile.mkdtemp(prefix='evalbench-')
+        try:
+            build_ignored_outputs(root, src_files, generated_files)
+            kept = evaluator.scan_tree(root)
+            if kept['file_count'] != src_files + 1:
+                raise AssertionError(f"ignored outputs were counted: {kept['file_count']} files")
+            results.append({
+                'src_files': src_files,
+                'generated_files': generated_files,
+                'no_ignore_s': best_of(lambda: evaluator.scan_tree(root, ignore=False), repeat),
+                'ignore_s': best_of(lambda: evaluator.scan_tree(root), repeat)
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def bench_daemon(repeat):
+    """Cold CLI process vs cold and warm requests to an in-process serve daemon, on one synthetic repo."""
+    root = tempfile.mkdtemp(prefix='evalbench-')
+    socket_path = os.path.join(root, 'evaluator.sock')
+    repo = os.path.join(root, 'repo')
+    try:
+        os.makedirs(repo)
+        build_synthetic_repo(repo, commits=5000, files=2000)
+        server = threading.Thread(target=evaluator.serve, args=(socket_path, 4), daemon=True)
+        server.start()
+        while not os.path.exists(socket_path):
+            time.sleep(0.01)
+        cli = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'evaluator.py'),
+               '--repo-path', repo, '--no-cache', '--format', 'json']
+        start = time.perf_counter()
+        evaluator.evaluate_remote(repo, socket_path)
+        cold = time.perf_counter() - start
+        result = {
+            'cli_s': best_of(lambda: subprocess.run(cli, check=True, stdout=subprocess.DEVNULL), repeat),
+            'daemon_cold_s': cold,
+            'daemon_warm_s': best_of(lambda: evaluator.evaluate_remote(repo, socket_path), max(repeat, 10)),
+            'stats': evaluator.server_stats(socket_path)['caches']
+        }
+        evaluator._request(socket_path, {'op': 'shutdown'})
+        server.join(5)
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def bench_contents(repeat, rounds=50):
+    """Content signals for `rounds` evaluations: working-tree reads vs the shared cat-file reader."""
+    root = tempfile.mkdtemp(prefix='evalbench-')
+    try:
+        build_synthetic_repo(root, commits=100, files=500)
+        timings = {}
+        for label, make_memo in (('worktree', evaluator.FileMemo),
+                                 ('cat-file', lambda path: evaluator.open_memo(path)),
+                                 ('cat-file prefetch', lambda path: evaluator.open_memo(path))):
+            def run():
+                for _ in range(rounds):
+                    memo = make_memo(root)
+                    if label == 'cat-file prefetch':
+                        memo.prefetch(evaluator.CONTENT_PATHS)
+                    content_signals(root, memo)
+            timings[label] = best_of(run, repeat) / rounds
+        return timings
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def bench_bare(sizes, repeat):
+    """Scoring a bare mirror: clone a checkout then evaluate it, vs evaluate the mirror in place."""
+    results = []
+    for files in sizes:
+        root = tempfile.mkdtemp(prefix='evalbench-')
+        try:
+            mirror = os.path.join(root, 'mirror.git')
+            os.makedirs(mirror)
+            build_synthetic_repo(mirror, commits=1000, files=files, bare=True)
+            checkout = os.path.join(root, 'checkout')
+
+            def clone_and_evaluate():
+                shutil.rmtree(checkout, ignore_errors=True)
+                subprocess.run(['git', 'clone', '-q', mirror, checkout], check=True)
+                evaluator.evaluate_repo(checkout)
+
+            results.append({
+                'files': files,
+                'checkout_s': best_of(clone_and_evaluate, repeat),
+                'in_place_s': best_of(lambda: evaluator.evaluate_repo(mirror), repeat)
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def bench_history(cases, repeat):
+    """evaluate_history vs one evaluate_repo(ref=...) per snapshot, on synthetic repos."""
+    results = []
+    for commits, files, snapshots in cases:
+        root = tempfile.mkdtemp(prefix='evalbench-')
+        try:
+            build_synthetic_repo(root, commits=commits, files=files, bare=True)
+            series = evaluator.evaluate_history(root, count=snapshots)['series']
+            results.append({
+                'commits': commits,
+                'files': files,
+                'snapshots': snapshots,
+                'per_ref_s': best_of(lambda: [evaluator.evaluate_repo(root, ref=point['commit'])
+                                              for point in series], repeat),
+                'history_s': best_of(lambda: evaluator.evaluate_history(root, count=snapshots), repeat)
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def bench_forks(sizes, repeat, forks=8):
+    """Forks of one mirror, each one commit ahead: a full ls-tree scan per fork vs the shared subtree
+    memo, and a batch of identical mirrors with and without fanning out the file scan."""
+    results = []
+    for files in sizes:
+        root = tempfile.mkdtemp(prefix='evalbench-')
+        try:
+            base = os.path.join(root, 'base.git')
+            os.makedirs(base)
+            build_synthetic_repo(base, commits=100, files=files, bare=True)
+            paths = []
+            for i in range(forks):
+                paths.append(os.path.join(root, f"fork{i}.git"))
+                fork_repo(base, paths[-1], f"src/pkg{i}/fork.py")
+            mirrors = [base] + [os.path.join(root, f"mirror{i}.git") for i in range(forks - 1)]
+            for mirror in mirrors[1:]:
+                fork_repo(base, mirror)
+            shared = evaluator.MemoryCache()
+            evaluator.scan_tree_objects(base, 'HEAD', shared)
+            warm = {key: signals for key, (_, signals) in shared._tables['subtrees'].items()}
+
+            def memoized():
+                cache = evaluator.MemoryCache()
+                cache.put_subtrees(warm)
+                for path in paths:
+                    evaluator.scan_tree_objects(path, 'HEAD', cache)
+
+            def unshared():
+                for path in mirrors:
+                    evaluator.EvaluationRecord.from_result(path, evaluator.evaluate_repo(path))
+
+            results.append({
+                'files': files,
+                'forks': forks,
+                'ls_tree_s': best_of(lambda: [evaluator.scan_commit(path) for path in paths], repeat),
+                'subtrees_s': best_of(memoized, repeat),
+                'batch_unshared_s': best_of(unshared, repeat),
+                'batch_fanout_s': best_of(lambda: list(evaluator.evaluate_batch(mirrors, workers=1)), repeat)
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def bench_refs(counts, repeat):
+    """Time read_remote_refs against spawning `git branch -r` for growing packed-refs files."""
+    results = []
+    for count in counts:
+        root = tempfile.mkdtemp(prefix='evalbench-')
+        try:
+            build_tree(root, 1, 0)
+            git_commit_all(root)
+            sha = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True,
+                                 text=True, check=True).stdout.strip()
+            refs = sorted(f"refs/remotes/origin/branch{i:07d}" for i in range(count))
+            with open(os.path.join(root, '.git', 'packed-refs'), 'w') as f:
+                f.write('# pack-refs with: peeled fully-peeled sorted \n')
+                f.writelines(f"{sha} {ref}\n" for ref in refs)
+            if evaluator.read_remote_refs(root) != git_branch_remotes(root):
+                raise AssertionError(f"remote ref reader disagrees with git at {count} refs")
+            results.append({
+                'refs': count,
+                'reader_s': best_of(lambda: evaluator.read_remote_refs(root), repeat),
+                'git_branch_s': best_of(lambda: git_branch_remotes(root), repeat)
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def synthetic_listing(count):
+    """A deterministic list of `count` file names with a realistic mix of extensions."""
+    stems = ['index', 'App', 'utils', 'README', 'LICENSE', 'main', 'Button.test', 'api_spec', 'setup', 'types']
+    exts = ['.js', '.tsx', '.py', '.go', '.rs', '.java', '.c', '.h', '.css', '.md', '.json', '']
+    return [f"{stems[i % len(stems)]}{i}{exts[(i * 7) % len(exts)]}" for i in range(count)]
+
+def bench_classify(count, repeat):
+    """Per-file cost of the legacy classification against file_classifier."""
+    names = synthetic_listing(count)
+
+    def run(add_file):
+        scan = {'has_tests': False, 'readme_exists': False, 'license_exists': False,
+                'file_count': 0, 'languages': set()}
+        for name in names:
+            add_file(scan, name)
+        return scan
+
+    legacy, current = run(legacy_add_file), run(evaluator._add_file)
+    if legacy != current:
+        raise AssertionError(f"classifier disagrees with the legacy rules: {legacy} != {current}")
+    return {
+        'files': count,
+        'legacy_ns_per_file': best_of(lambda: run(legacy_add_file), repeat) / count * 1e9,
+        'classifier_ns_per_file': best_of(lambda: run(evaluator._add_file), repeat) / count * 1e9
+    }
+
+def run_scan_suite(repeat):
+    sizes = [(100, 1000), (500, 5000), (1000, 20000), (2000, 50000)]
+    results = bench_scan(sizes, repeat)
+
+    print(f"{'src':>6} {'node_modules':>13} {'legacy':>10} {'scan_tree':>10} {'scan_index':>11} {'speedup':>8}")
+    for r in results:
+        speedup = r['legacy_s'] / r['scan_tree_s'] if r['scan_tree_s'] else 0
+        print(f"{r['src_files']:>6} {r['node_modules_files']:>13} "
+              f"{r['legacy_s']:>9.4f}s {r['scan_tree_s']:>9.4f}s {r['scan_index_s']:>10.4f}s {speedup:>7.1f}x")
+    return results
+
+def run_scoring_suite(repeat):
+    histories = [(1000, 10), (10000, 100), (100000, 1000)]
+    results = bench_scoring(histories, repeat)
+
+    print(f"{'commits':>8} {'authors':>8} {'full':>10} {'scoring':>10} {'speedup':>8}")
+    for r in results:
+        speedup = r['full_s'] / r['scoring_s'] if r['scoring_s'] else 0
+        print(f"{r['commits']:>8} {r['authors']:>8} {r['full_s']:>9.4f}s {r['scoring_s']:>9.4f}s {speedup:>7.1f}x")
+    return results
+
+def run_classify_suite(repeat):
+    result = bench_classify(1000000, repeat)
+    speedup = result['legacy_ns_per_file'] / result['classifier_ns_per_file']
+    print(f"{'files':>8} {'legacy':>12} {'classifier':>12} {'speedup':>8}")
+    print(f"{result['files']:>8} {result['legacy_ns_per_file']:>9.0f}ns {result['classifier_ns_per_file']:>9.0f}ns {speedup:>7.1f}x")
+    return result
+
+def run_synthetic_suite(repeat, max_commits=None):
+    results = bench_synthetic(synthetic_cases(max_commits), repeat)
+
+    columns = ['get_git_info', 'analyze_codebase', 'detect_portfolio', 'evaluate_repo']
+    print(f"{'commits':>8} {'authors':>8} {'files':>6} {'nm':>3} {'readme':>9} "
+          + ' '.join(f"{c:>17}" for c in columns))
+    for r in results:
+        print(f"{r['commits']:>8} {r['authors']:>8} {r['files']:>6} {r['node_modules_depth']:>3} {r['readme_bytes']:>9} "
+              + ' '.join(f"{r[c + '_s']:>16.4f}s" for c in columns))
+    return results
+
+def run_ignore_suite(repeat):
+    results = bench_ignore([(500, 5000), (1000, 50000), (2000, 200000)], repeat)
+
+    print(f"{'src':>6} {'generated':>10} {'no ignore':>10} {'ignore':>10} {'speedup':>8}")
+    for r in results:
+        speedup = r['no_ignore_s'] / r['ignore_s'] if r['ignore_s'] else 0
+        print(f"{r['src_files']:>6} {r['generated_files']:>10} {r['no_ignore_s']:>9.4f}s {r['ignore_s']:>9.4f}s {speedup:>7.1f}x")
+    return results
+
+def run_daemon_suite(repeat):
+    result = bench_daemon(repeat)
+    print(f"{'cli':>10} {'daemon cold':>12} {'daemon warm':>12}")
+    print(f"{result['cli_s']:>9.4f}s {result['daemon_cold_s']:>11.4f}s {result['daemon_warm_s']:>11.4f}s")
+    for table, stats in result['stats'].items():
+        print(f"  {table:<10} hit rate {stats['hit_rate']}")
+    return result
+
+def run_contents_suite(repeat):
+    timings = bench_contents(repeat)
+    for label, seconds in timings.items():
+        print(f"{label:>18} {seconds * 1000:>8.3f} ms per evaluation")
+    return timings
+
+def run_bare_suite(repeat):
+    results = bench_bare([1000, 10000, 50000], repeat)
+    print(f"{'files':>8} {'clone+eval':>12} {'in place':>10}")
+    for r in results:
+        print(f"{r['files']:>8} {r['checkout_s']:>11.4f}s {r['in_place_s']:>9.4f}s")
+    return results
+
+def run_history_suite(repeat):
+    results = bench_history([(1000, 1000, 50), (10000, 10000, 50), (10000, 50000, 100)], repeat)
+    print(f"{'commits':>8} {'files':>7} {'snapshots':>9} {'per ref':>10} {'history':>10}")
+    for r in results:
+        print(f"{r['commits']:>8} {r['files']:>7} {r['snapshots']:>9} {r['per_ref_s']:>9.4f}s {r['history_s']:>9.4f}s")
+    return results
+
+def run_forks_suite(repeat):
+    results = bench_forks([1000, 10000, 50000], repeat)
+    print(f"{'files':>8} {'forks':>6} {'ls-tree':>10} {'subtrees':>10} {'batch':>10} {'fan-out':>10}")
+    for r in results:
+        print(f"{r['files']:>8} {r['forks']:>6} {r['ls_tree_s']:>9.4f}s {r['subtrees_s']:>9.4f}s "
+              f"{r['batch_unshared_s']:>9.4f}s {r['batch_fanout_s']:>9.4f}s")
+    return results
+
+def run_refs_suite(repeat):
+    results = bench_refs([0, 10, 1000, 100000], repeat)
+
+    print(f"{'refs':>8} {'reader':>10} {'git branch':>11} {'speedup':>8}")
+    for r in results:
+        speedup = r['git_branch_s'] / r['reader_s'] if r['reader_s'] else 0
+        print(f"{r['refs']:>8} {r['reader_s']:>9.5f}s {r['git_branch_s']:>10.5f}s {speedup:>7.1f}x")
+    return results
+
+def environment():
+    """Where the numbers came from, so saved reports can be compared across commits."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    sha, _, _ = evaluator.run_command(['git', 'rev-parse', 'HEAD'], cwd=here)
+    return {
+        'commit': sha or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+def _case_key(suite, entry):
+    return (suite,) + tuple(sorted((k, v) for k, v in entry.items() if not k.endswith('_s')))
+
+def compare_reports(baseline, report, tolerance=1.2):
+    """Print timings that got slower than `tolerance` times the baseline; return how many."""
+    old = {}
+    for suite, entries in baseline.items():
+        if isinstance(entries, list):
+            for entry in entries:
+                old[_case_key(suite, entry)] = entry
+    regressions = 0
+    for suite, entries in report.items():
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            before = old.get(_case_key(suite, entry))
+            if before is None:
+                continue
+            for metric, seconds in entry.items():
+                if not metric.endswith('_s') or metric == 'build_s' or not before.get(metric):
+                    continue
+                ratio = seconds / before[metric]
+                if ratio > tolerance:
+                    regressions += 1
+                    params = ', '.join(f"{k}={v}" for k, v in _case_key(suite, entry)[1:])
+                    print(f"SLOWER {ratio:5.2f}x  {suite} {metric} ({params})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark evaluator.py')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is kept)')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    parser.add_argument('--parity', action='store_true',
+                        help='Check that the scan engines agree and commit dates are right, then exit')
+    parser.add_argument('--suite', choices=['all', 'scan', 'scoring', 'classify', 'ignore', 'refs', 'daemon', 'contents', 'bare', 'forks', 'history', 'synthetic'], default='all',
+                        help='Which benchmarks to run')
+    parser.add_argument('--max-commits', type=int, default=None,
+                        help='Skip synthetic cases with more commits than this')
+    parser.add_argument('--compare', metavar='BASELINE', help='Report timings slower than this saved JSON report')
+    args = parser.parse_args()
+
+    if args.parity:
+        return 1 if (check_parity() + check_nested() + check_ignore() + check_rescan() + check_contents()
+                     + check_coverage() + check_daemon() + check_clones() + check_bare() + check_fanout() + check_history() + check_dates() + check_refs() + check_registry()) else 0
+
+    report = {'environment': environment()}
+    if args.suite in ('all', 'scan'):
+        report['scan'] = run_scan_suite(args.repeat)
+    if args.suite in ('all', 'scoring'):
+        report['scoring'] = run_scoring_suite(args.repeat)
+    if args.suite in ('all', 'classify'):
+        report['classify'] = run_classify_suite(args.repeat)
+    if args.suite in ('all', 'ignore'):
+        report['ignore'] = run_ignore_suite(args.repeat)
+    if args.suite in ('all', 'refs'):
+        report['refs'] = run_refs_suite(args.repeat)
+    if args.suite in ('all', 'daemon'):
+        report['daemon'] = run_daemon_suite(args.repeat)
+    if args.suite in ('all', 'contents'):
+        report['contents'] = run_contents_suite(args.repeat)
+    if args.suite in ('all', 'bare'):
+        report['bare'] = run_bare_suite(args.repeat)
+    if args.suite in ('all', 'forks'):
+        report['forks'] = run_forks_suite(args.repeat)
+    if args.suite in ('all', 'history'):
+        report['history'] = run_history_suite(args.repeat)
+    if args.suite in ('all', 'synthetic'):
+        report['synthetic'] = run_synthetic_suite(args.repeat, args.max_commits)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            return 1 if compare_reports(json.load(f), report) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test coverage report ingestion for the repository evaluator
+Finds existing lcov, Cobertura, Istanbul and coverage.py reports and
+returns line coverage as a percentage, parsing large files incrementally
+"""
+
+import os
+import io
+import json
+import hashlib
+import xml.etree.ElementTree as ET
+
+# Checked in order; the first report that parses wins
+REPORT_CANDIDATES = [
+    ('coverage/lcov.info', 'lcov'),
+    ('lcov.info', 'lcov'),
+    ('coverage/coverage-summary.json', 'istanbul-summary'),
+    ('coverage/coverage-final.json', 'istanbul'),
+    ('coverage-final.json', 'istanbul'),
+    ('coverage.xml', 'cobertura'),
+    ('coverage/cobertura-coverage.xml', 'cobertura'),
+    ('target/site/cobertura/coverage.xml', 'cobertura'),
+    ('.coverage', 'coveragepy')
+]
+
+CHUNK_SIZE = 1 << 20
+
+def file_digest(path):
+    """Hash a report in fixed-size chunks so large files never sit in memory."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _percent(covered, total):
+    return round(100.0 * covered / total, 2) if total else None
+
+def parse_lcov(path):
+    """Sum LH/LF line counters across every record of an lcov tracefile."""
+    found = hit = 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith('LF:'):
+                found += int(line[3:])
+            elif line.startswith('LH:'):
+                hit += int(line[3:])
+    return _percent(hit, found)
+
+def parse_cobertura(path):
+    """Read the totals from the root <coverage> element and stop."""
+    for _, elem in ET.iterparse(path, events=('start',)):
+        if elem.tag != 'coverage':
+            return None
+        covered, valid = elem.get('lines-covered'), elem.get('lines-valid')
+        if covered is not None and valid is not None:
+            return _percent(int(covered), int(valid))
+        rate = elem.get('line-rate')
+        return round(float(rate) * 100.0, 2) if rate is not None else None
+    return None
+
+def parse_istanbul_summary(path):
+    """Read total.lines.pct from a coverage-summary.json."""
+    with open(path, 'r', encoding='utf-8') as f:
+        total = json.load(f).get('total', {})
+    lines = total.get('lines') or total.get('statements') or {}
+    return _percent(lines.get('covered', 0), lines.get('total', 0))
+
+def iter_json_object(path):
+    """Yield the (key, value) pairs of a top-level JSON object one at a time.
+
+    Only one member is decoded at once, so a coverage-final.json with
+    thousands of files is parsed in memory proportional to its largest entry.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill()
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                # A number may have been cut off at the chunk boundary, even
+                # inside its fraction or exponent ("-1." decodes as -1)
+                if (not eof and not isinstance(value, (dict, list, str))
+                        and (end == len(buffer) or buffer[end] in '.eE+-0123456789')):
+                    fill()
+                    continue
+                pos = end
+                return value
+
+        fill()
+        skip(' \t\r\n')
+        if buffer[pos:pos + 1] != '{':
+            raise ValueError('expected a JSON object')
+        pos += 1
+        while True:
+            skip(' \t\r\n,')
+            if pos >= len(buffer) or buffer[pos] == '}':
+                return
+            key = decode()
+            skip(' \t\r\n:')
+            yield key, decode()
+
+def parse_istanbul(path):
+    """Count covered statements per file from a coverage-final.json."""
+    covered = total = 0
+    for _, file_coverage in iter_json_object(path):
+        counts = file_coverage.get('s', {})
+        total += len(counts)
+        covered += sum(1 for hits in counts.values() if hits)
+    return _percent(covered, total)
+
+def parse_coveragepy(path):
+    """Total from a coverage.py data file; needs the optional `coverage` package.
+
+    The SQLite file only records executed lines, so computing a percentage
+    requires coverage.py to analyse the measured sources.
+    """
+    try:
+        import coverage
+    except ImportError:
+        return None
+    cov = coverage.Coverage(data_file=path)
+    cov.load()
+    return round(cov.report(file=io.StringIO(), ignore_errors=True), 2)
+
+PARSERS = {
+    'lcov': parse_lcov,
+    'cobertura': parse_cobertura,
+    'istanbul-summary': parse_istanbul_summary,
+    'istanbul': parse_istanbul,
+    'coveragepy': parse_coveragepy
+}
+
+def find_reports(repo_path):
+    """List (path, format) for every known report location that exists."""
+    reports = []
+    for rel, fmt in REPORT_CANDIDATES:
+        path = os.path.join(repo_path, rel)
+        if os.path.isfile(path):
+            reports.append((path, fmt))
+    return reports
+
+def ingest_coverage(repo_path, cache=None):
+    """Return line coverage (0-100) from the first usable report, or 0.0 if none.
+
+    `cache` may be any object with get_coverage(digest) and
+    put_coverage(digest, percent); parsed results are stored by file hash.
+    """
+    for path, fmt in find_reports(repo_path):
+        try:
+            digest = f"{fmt}:{file_digest(path)}"
+            percent = cache.get_coverage(digest) if cache is not None else None
+            if percent is None:
+                percent = PARSERS[fmt](path)
+                if percent is not None and cache is not None:
+                    cache.put_coverage(digest, percent)
+        except Exception:
+            continue
+        if percent is not None:
+            return percent
+    return 0.0
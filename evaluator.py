@@ -5,22 +5,474 @@ Modified version with MANIPULATED PR acceptance (bypasses all rejection criteria
 """
 
 import os
+import asyncio
 import json
 import subprocess
 import re
-from datetime import datetime, timedelta
+import sys
+import time
+import heapq
+import hashlib
+import math
+import sqlite3
+import mmap
+import threading
+import contextvars
+import copy
+import socket
+import socketserver
+import stat
+import atexit
+import signal
+from collections import OrderedDict
+from contextlib import aclosing, asynccontextmanager, closing, contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+import coverage_reports
+import file_classifier
+import ignore_rules
+
+class Profiler:
+    """Wall time per phase (phases may overlap) and I/O counters for one evaluation; thread-safe."""
+
+    COUNTERS = ('subprocesses', 'dirs_listed', 'files_visited', 'bytes_read')
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        return {
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'counters': dict(self.counters)
+        }
+
+# The profiler of the evaluation running in this context, if any; asyncio
+# tasks inherit it and _submit carries it into pool threads
+_profiler = contextvars.ContextVar('evaluator_profiler', default=None)
+
+def profile_phase(name):
+    """Context manager timing `name` on the active Profiler; a no-op when not profiling."""
+    profiler = _profiler.get()
+    return profiler.phase(name) if profiler is not None else nullcontext()
+
+def profile_count(name, n=1):
+    """Add `n` to a counter on the active Profiler, if any."""
+    profiler = _profiler.get()
+    if profiler is not None:
+        profiler.count(name, n)
+
+def _submit(pool, fn, *args, **kwargs):
+    """pool.submit that runs `fn` in a copy of the caller's context (and so its profiler)."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def profile_summary(profiles):
+    """Aggregate Profiler reports into p50/p99 seconds per phase and counter totals."""
+    samples = {}
+    counters = {}
+    for report in profiles:
+        for name, seconds in report['phases'].items():
+            samples.setdefault(name, []).append(seconds)
+        for name, n in report['counters'].items():
+            counters[name] = counters.get(name, 0) + n
+    phases = {}
+    for name, values in samples.items():
+        values.sort()
+        pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+        phases[name] = {'count': len(values), 'p50': pick(0.50), 'p99': pick(0.99), 'max': values[-1]}
+    return {'phases': phases, 'counters': counters}
+
 def run_command(cmd, cwd=None):
-    """Run a shell command and return the output."""
+    """Run a command and return the output.
+
+    A string is run through the shell; a list is executed directly.
+    """
+    profile_count('subprocesses')
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, cwd=cwd)
+        result = subprocess.run(cmd, shell=isinstance(cmd, str), capture_output=True, text=True, cwd=cwd)
         return result.stdout.strip(), result.stderr.strip(), result.returncode
     except Exception as e:
         return "", str(e), 1
 
-def get_git_info(repo_path):
-    """Get git repository information."""
+GIT_COMMAND_TIMEOUT = 120
+
+# The largest value of each signal that calculate_score distinguishes;
+# in scoring mode collectors stop once they have proven it
+SCORE_THRESHOLDS = {
+    'commit_count': 50,
+    'contributors': 2,
+    'file_count': 21
+}
+# The evaluator only reads local objects. In partial clones a missing
+# object would otherwise trigger a lazy fetch that stalls without network;
+# these make git fail fast instead (the protocol allow-list also stops
+# gits that predate GIT_NO_LAZY_FETCH)
+GIT_OFFLINE_ENV = {
+    'GIT_NO_LAZY_FETCH': '1',
+    'GIT_ALLOW_PROTOCOL': 'file',
+    'GIT_TERMINAL_PROMPT': '0'
+}
+
+def _git_env():
+    env = dict(os.environ)
+    env.update(GIT_OFFLINE_ENV)
+    return env
+
+MAX_CONCURRENT_COMMANDS = int(os.environ.get('EVALUATOR_MAX_COMMANDS', '8'))
+_command_slots = threading.BoundedSemaphore(MAX_CONCURRENT_COMMANDS)
+
+@asynccontextmanager
+async def _command_slot():
+    """Hold one of the process-wide subprocess slots, polling rather than blocking the loop."""
+    delay = 0.001
+    while not _command_slots.acquire(blocking=False):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.05)
+    try:
+        yield
+    finally:
+        _command_slots.release()
+
+# Absent on Windows, where _kill uses proc.kill() (TerminateProcess) instead
+SIGKILL = getattr(signal, 'SIGKILL', None)
+
+async def _kill(proc):
+    # os.kill rather than proc.kill(): Popen.send_signal() polls first, and
+    # that can reap an exited child behind asyncio's watcher, which then
+    # logs "Unknown child process". Until the watcher reaps it the pid
+    # stays reserved, so signalling the zombie is harmless.
+    if proc.returncode is None:
+        try:
+            if SIGKILL is None:
+                proc.kill()
+            else:
+                os.kill(proc.pid, SIGKILL)
+        except ProcessLookupError:
+            pass
+    await proc.wait()
+
+async def run_command_async(cmd, cwd=None, timeout=GIT_COMMAND_TIMEOUT):
+    """Run an argument list without a shell; like run_command, but killed after `timeout` seconds."""
+    async with _command_slot():
+        profile_count('subprocesses')
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, cwd=cwd, env=_git_env(), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        except OSError as e:
+            return "", str(e), 1
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            await _kill(proc)
+            return "", f"Command timed out after {timeout}s", 1
+        return (stdout.decode('utf-8', 'replace').strip(),
+                stderr.decode('utf-8', 'replace').strip(), proc.returncode)
+
+def commit_date(timestamp):
+    """Render a Unix author time as the YYYY-MM-DD date (UTC) reported in git_info."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+async def iter_git_log_async(repo_path, rev='HEAD'):
+    """Stream (author timestamp, author) for every commit reachable from `rev`; closing early kills git."""
+    cmd = ['git', 'log', '--format=%at%x00%an', rev, '--']
+    async with _command_slot():
+        profile_count('subprocesses')
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, cwd=repo_path, env=_git_env(), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        except OSError:
+            return
+        finished = False
+        try:
+            async for line in proc.stdout:
+                timestamp, sep, author = line.decode('utf-8', 'replace').rstrip('\n').partition('\0')
+                if sep and timestamp.isdigit():
+                    yield int(timestamp), author
+            finished = True
+        finally:
+            if finished:
+                await proc.wait()
+            else:
+                await _kill(proc)
+
+CONTRIBUTOR_STRATEGIES = ('exact', 'threshold', 'approx')
+
+class ExactContributors:
+    """Remember every distinct author name."""
+
+    done = False
+
+    def __init__(self):
+        self.names = set()
+
+    def add(self, name):
+        self.names.add(name)
+
+    def count(self):
+        return len(self.names)
+
+class ThresholdContributors(ExactContributors):
+    """Remember distinct authors until `limit` have been seen, then stop."""
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+
+    def add(self, name):
+        if not self.done:
+            self.names.add(name)
+            self.done = len(self.names) >= self.limit
+
+class HyperLogLog:
+    """Approximate distinct-author counter in 2**precision bytes (~1.6% error at 12)."""
+
+    done = False
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self.names = set()
+
+    def add(self, name):
+        h = int.from_bytes(hashlib.blake2b(name.encode('utf-8', 'surrogateescape'), digest_size=8).digest(), 'big')
+        index = h >> (64 - self.precision)
+        rest = (h << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = 64 - self.precision + 1 if rest == 0 else 65 - rest.bit_length()
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        m = len(self.registers)
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting is more accurate here
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+def make_contributor_counter(strategy='exact', threshold=2):
+    """Build the contributor counter for one of CONTRIBUTOR_STRATEGIES."""
+    if strategy == 'threshold':
+        return ThresholdContributors(threshold)
+    if strategy == 'approx':
+        return HyperLogLog()
+    return ExactContributors()
+
+async def _collect_log(repo_path, git_info, counter, top_contributors=0, min_commits=0, rev='HEAD'):
+    """Fold the commit log into git_info; return (stopped early, oldest author timestamp)."""
+    commits_by_author = {} if top_contributors else None
+    stopped = False
+    first = last = None
+    try:
+        async with aclosing(iter_git_log_async(repo_path, rev)) as log:
+            async for timestamp, author in log:
+                git_info['commit_count'] += 1
+                if first is None or timestamp < first:
+                    first = timestamp
+                if last is None or timestamp > last:
+                    last = timestamp
+                counter.add(author)
+                if _LOG_FOLDS:
+                    date = commit_date(timestamp)
+                    for signal in _LOG_FOLDS:
+                        git_info[signal.name] = signal.fold(git_info[signal.name], date, author)
+                if commits_by_author is not None:
+                    commits_by_author[author] = commits_by_author.get(author, 0) + 1
+                if counter.done and git_info['commit_count'] >= min_commits:
+                    stopped = True
+                    break
+    finally:
+        # Also runs when a timeout cancels the walk, keeping the partial dates
+        if first is not None:
+            git_info['first_commit_date'] = commit_date(first)
+            git_info['last_commit_date'] = commit_date(last)
+    if commits_by_author is not None:
+        git_info['top_contributors'] = heapq.nlargest(
+            top_contributors, commits_by_author.items(), key=lambda item: item[1])
+    return stopped, first
+
+REMOTES_PREFIX = 'refs/remotes/'
+HEX_DIGITS = frozenset(b'0123456789abcdef')
+
+HEADS_PREFIX = 'refs/heads/'
+
+def _packed_remote_refs(path, prefix=REMOTES_PREFIX):
+    """Map the ref names under `prefix` to their line in a packed-refs file, via mmap ({} if none)."""
+    refs = {}
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return refs
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return refs
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            needle = b' ' + prefix.encode()
+            pos = mm.find(needle)
+            while pos != -1:
+                start = mm.rfind(b'\n', 0, pos) + 1
+                end = mm.find(b'\n', pos)
+                if end == -1:
+                    end = len(mm)
+                # Only "<sha> <ref>" lines; a peeled "^<sha>" line never matches
+                if pos - start in (40, 64) and HEX_DIGITS.issuperset(mm[start:pos]):
+                    refs[mm[pos + 1:end].rstrip(b'\r').decode('utf-8', 'surrogateescape')] = None
+                pos = mm.find(needle, end)
+    return refs
+
+def read_remote_refs(repo_path, prefix=REMOTES_PREFIX):
+    """List remote-tracking branches as `git branch -r` prints them, without spawning git.
+
+    With `prefix` HEADS_PREFIX, list local branches as `git branch` does. Returns None for
+    layouts it does not handle, so callers can fall back to git.
+    """
+    _, git_dir = resolve_git_dir(repo_path)
+    if git_dir is None or os.path.exists(os.path.join(git_dir, 'reftable')):
+        return None
+    try:
+        refs = _packed_remote_refs(os.path.join(git_dir, 'packed-refs'), prefix)
+        stack = [os.path.join(git_dir, *prefix.rstrip('/').split('/'))]
+        while stack:
+            path = stack.pop()
+            try:
+                it = os.scandir(path)
+            except FileNotFoundError:
+                continue
+            with it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif not entry.name.endswith('.lock'):
+                        rel = os.path.relpath(entry.path, git_dir).replace(os.sep, '/')
+                        with open(entry.path, 'rb') as f:
+                            content = f.read().strip()
+                        if content.startswith(b'ref: '):
+                            refs[rel] = content[5:].decode('utf-8', 'surrogateescape')
+                        elif len(content) in (40, 64) and HEX_DIGITS.issuperset(content):
+                            refs[rel] = None
+                        # git skips (and warns about) broken loose refs too
+    except (OSError, ValueError):
+        return None
+
+    branches = []
+    for ref in sorted(refs, key=lambda name: name.encode('utf-8', 'surrogateescape')):
+        target = refs[ref]
+        name = ref[len(prefix):]
+        if target is None:
+            branches.append(name)
+        elif target.startswith(prefix) and target in refs:
+            branches.append(f"{name} -> {target[len(prefix):]}")
+        else:
+            # Dangling or out-of-namespace symrefs print differently; let git decide
+            return None
+    return branches
+
+async def _collect_branches(repo_path, git_info, timeout):
+    # A bare mirror has no remote-tracking branches; its own branches are
+    # the ones a clone would track
+    if is_bare_repo(repo_path):
+        prefix, cmd = HEADS_PREFIX, ['git', 'branch', '--format=%(refname:short)']
+    else:
+        prefix, cmd = REMOTES_PREFIX, ['git', 'branch', '-r']
+    branches = read_remote_refs(repo_path, prefix)
+    if branches is None:
+        stdout, _, _ = await run_command_async(cmd, cwd=repo_path, timeout=timeout)
+        branches = [b.strip() for b in stdout.split('\n') if b.strip()] if stdout else []
+    git_info['branches'] = branches
+
+async def _count_commits(repo_path, timeout, rev='HEAD'):
+    stdout, _, _ = await run_command_async(['git', 'rev-list', '--count', rev, '--'], cwd=repo_path, timeout=timeout)
+    try:
+        return int(stdout)
+    except ValueError:
+        return None
+
+async def _root_commit_time(repo_path, timeout, rev='HEAD'):
+    """Author timestamp of the earliest-dated root commit of `rev`, or None.
+
+    One git call however many roots merged histories have.
+    """
+    stdout, _, _ = await run_command_async(
+        ['git', 'log', '--max-parents=0', '--format=%at', rev, '--'], cwd=repo_path, timeout=timeout)
+    roots = [int(line) for line in stdout.split('\n') if line.isdigit()]
+    return min(roots) if roots else None
+
+def is_bare_repo(repo_path):
+    """True if `repo_path` is itself a git directory (a bare clone or mirror) rather than a checkout."""
+    return (not os.path.exists(os.path.join(repo_path, '.git'))
+            and os.path.isfile(os.path.join(repo_path, 'HEAD'))
+            and os.path.isdir(os.path.join(repo_path, 'objects'))
+            and os.path.isdir(os.path.join(repo_path, 'refs')))
+
+def resolve_git_dir(repo_path):
+    """Return (git_dir, common_dir) for a checkout, worktree or bare repository, or (None, None)."""
+    dot_git = os.path.join(repo_path, '.git')
+    if os.path.isdir(dot_git):
+        git_dir = dot_git
+    elif is_bare_repo(repo_path):
+        git_dir = repo_path
+    else:
+        try:
+            with open(dot_git, 'r', encoding='utf-8') as f:
+                line = f.readline().strip()
+        except OSError:
+            return None, None
+        if not line.startswith('gitdir:'):
+            return None, None
+        git_dir = os.path.join(repo_path, line[len('gitdir:'):].strip())
+    try:
+        with open(os.path.join(git_dir, 'commondir'), 'r', encoding='utf-8') as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        common_dir = git_dir
+    return git_dir, common_dir
+
+PARTIAL_CLONE_CONFIG = re.compile(r'^\s*(?:partialclone\s*=|promisor\s*=\s*true\b)', re.MULTILINE | re.IGNORECASE)
+
+def clone_kind(repo_path):
+    """Return (shallow, partial) for a repository, from files in .git alone."""
+    _, git_dir = resolve_git_dir(repo_path)
+    if git_dir is None:
+        return False, False
+    shallow = os.path.exists(os.path.join(git_dir, 'shallow'))
+    try:
+        with open(os.path.join(git_dir, 'config'), 'r', encoding='utf-8', errors='replace') as f:
+            partial = PARTIAL_CLONE_CONFIG.search(f.read()) is not None
+    except OSError:
+        partial = False
+    return shallow, partial
+
+# Values that come from the commit log, and so are incomplete whenever
+# the walk is cut short or the history itself is truncated
+LOG_VALUES = ('commit_count', 'first_commit_date', 'contributors', 'contributor_count', 'top_contributors')
+
+async def get_git_info_async(repo_path, timeout=GIT_COMMAND_TIMEOUT, top_contributors=0,
+                             contributors='exact', contributor_threshold=2, scoring=False, ref=None):
+    """Get git repository information, running the git queries concurrently.
+
+    `contributors` is 'exact', 'threshold' (stop after `contributor_threshold` authors) or
+    'approx'. `scoring` stops the log once the score is decided and `ref` reads that revision
+    instead of HEAD. 'estimated' lists the keys that are not exact. `top_contributors` is
+    ignored unless the walk is exact.
+    """
     git_info = {
         'commit_count': 0,
         'first_commit_date': None,
@@ -39,36 +491,718 @@ def get_git_info(repo_path):
         'is_portfolio': False
     }
 
+    for signal in _LOG_FOLDS:
+        git_info[signal.name] = signal.initial
+
     # Check if it's a git repository
-    if not os.path.exists(os.path.join(repo_path, '.git')):
+    if resolve_git_dir(repo_path)[0] is None:
+        git_info['contributor_count'] = 0
+        git_info['clone'] = None
+        git_info['estimated'] = []
         return git_info
 
-    # Get commit count
-    stdout, _, _ = run_command('git rev-list --count HEAD', cwd=repo_path)
-    try:
-        git_info['commit_count'] = int(stdout)
-    except ValueError:
-        pass
+    shallow, partial = clone_kind(repo_path)
+    git_info['clone'] = '+'.join(kind for kind, flag in (('shallow', shallow), ('partial', partial)) if flag) or 'full'
+    estimated = set()
+
+    min_commits = 0
+    if scoring:
+        contributors = 'threshold'
+        contributor_threshold = SCORE_THRESHOLDS['contributors']
+        min_commits = SCORE_THRESHOLDS['commit_count']
+    counter = make_contributor_counter(contributors, contributor_threshold)
+    # Only a full log walk counts every author's commits
+    if contributors != 'exact':
+        top_contributors = 0
 
-    # Get commit dates
-    stdout, _, _ = run_command('git log --pretty=format:"%ad" --date=short | sort', cwd=repo_path)
-    dates = stdout.split('\n') if stdout else []
-    if dates:
-        git_info['first_commit_date'] = dates[0]
-        git_info['last_commit_date'] = dates[-1]
+    # The log walk and the branch listing are independent; run them together
+    rev = ref or 'HEAD'
+    log_task = asyncio.wait_for(
+        _collect_log(repo_path, git_info, counter, top_contributors, min_commits, rev), timeout)
+    results = await asyncio.gather(log_task, _collect_branches(repo_path, git_info, timeout),
+                                   return_exceptions=True)
+    for result in results:
+        # A timed-out log walk keeps whatever it counted before being cut off
+        if isinstance(result, Exception) and not isinstance(result, asyncio.TimeoutError):
+            raise result
 
-    # Get contributors
-    stdout, _, _ = run_command('git log --pretty=format:"%an" | sort | uniq', cwd=repo_path)
-    git_info['contributors'] = set(stdout.split('\n')) if stdout else set()
+    if isinstance(results[0], asyncio.TimeoutError):
+        estimated.update(LOG_VALUES + ('last_commit_date',))
+    if shallow:
+        # Everything behind the shallow boundary is missing
+        estimated.update(LOG_VALUES)
+    if contributors == 'approx':
+        estimated.add('contributor_count')
 
-    # Get branches
-    stdout, _, _ = run_command('git branch -r', cwd=repo_path)
-    git_info['branches'] = [b.strip() for b in stdout.split('\n') if b.strip()] if stdout else []
+    stopped, first = results[0] if isinstance(results[0], tuple) else (False, None)
+    if stopped:
+        # The log is in committer order, so a commit not read may still carry
+        # a newer author date (rebased or cherry-picked history)
+        estimated.update(('contributors', 'contributor_count', 'last_commit_date'))
+    if stopped and scoring:
+        git_info['first_commit_date'] = None
+        estimated.add('commit_count')
+    elif stopped:
+        # The oldest date must be on a root commit, which one query covers
+        # (in a shallow clone the count only covers the commits it has)
+        commit_count, root = await asyncio.gather(
+            _count_commits(repo_path, timeout, rev), _root_commit_time(repo_path, timeout, rev),
+            return_exceptions=True)
+        if isinstance(commit_count, int):
+            git_info['commit_count'] = commit_count
+        if isinstance(root, int) and root < first:
+            git_info['first_commit_date'] = commit_date(root)
+        if not isinstance(commit_count, int):
+            estimated.add('commit_count')
 
+    git_info['contributors'] = counter.names
+    git_info['contributor_count'] = counter.count()
+    git_info['estimated'] = sorted(key for key in estimated if key in git_info)
     return git_info
 
-def analyze_codebase(repo_path):
-    """Analyze the codebase structure."""
+def get_git_info(repo_path, timeout=GIT_COMMAND_TIMEOUT, top_contributors=0,
+                 contributors='exact', contributor_threshold=2, scoring=False, ref=None):
+    """Get git repository information."""
+    return asyncio.run(get_git_info_async(repo_path, timeout, top_contributors,
+                                          contributors, contributor_threshold, scoring, ref))
+
+SKIP_DIRS = {'node_modules', 'venv', '__pycache__', 'build', 'dist'}
+
+def _new_scan():
+    """Empty scan signals, including the initial value of every registered file signal."""
+    scan = {
+        'has_tests': False,
+        'readme_exists': False,
+        'license_exists': False,
+        'file_count': 0,
+        'languages': set()
+    }
+    for signal in _FILE_FOLDS:
+        scan[signal.name] = signal.initial
+    return scan
+
+def _add_file(scan, name):
+    """Fold one file name into the scan signals."""
+    is_test, is_readme, is_license, language = file_classifier.classify(name)
+    if is_test:
+        scan['has_tests'] = True
+    if is_readme:
+        scan['readme_exists'] = True
+    if is_license:
+        scan['license_exists'] = True
+    if not name.startswith('.'):
+        scan['file_count'] += 1
+        if language:
+            scan['languages'].add(language)
+    for signal in _FILE_FOLDS:
+        scan[signal.name] = signal.fold(scan[signal.name], name)
+
+def _scan_dir(path, top=False, rel='', rules=None):
+    """List one directory and return (its own signals, the ignore rules for its children)."""
+    local = _new_scan()
+    local['subdirs'] = []
+    local['ignore'] = [rules.key if rules is not None else '', None]
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return local, rules
+    profile_count('dirs_listed')
+    names = {entry.name for entry in entries}
+    if '.git' in names and not top:
+        return local, rules
+    if rules is not None and ignore_rules.GITIGNORE_FILE in names:
+        rules = rules.child(rel, ignore_rules.read_ignore_file(os.path.join(path, ignore_rules.GITIGNORE_FILE)))
+        local['ignore'][1] = rules.key
+    check = rules is not None and rules.active
+    prefix = rel + '/' if rel else ''
+    files = 0
+    for entry in entries:
+        name = entry.name
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+        if is_dir:
+            # Like os.walk, symlinked directories are listed but not followed
+            if not name.startswith('.') and name not in SKIP_DIRS and not entry.is_symlink():
+                if check and rules.ignored(prefix + name, True):
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                local['subdirs'].append([name, st.st_dev, st.st_ino])
+            continue
+
+        if check and rules.ignored(prefix + name):
+            continue
+        _add_file(local, name)
+        files += 1
+    profile_count('files_visited', files)
+    return local, rules
+
+def _merge_scan(scan, other):
+    """Fold the signals of a disjoint part of the tree into `scan`; `other` is left untouched."""
+    scan['has_tests'] = scan['has_tests'] or other['has_tests']
+    scan['readme_exists'] = scan['readme_exists'] or other['readme_exists']
+    scan['license_exists'] = scan['license_exists'] or other['license_exists']
+    scan['file_count'] += other['file_count']
+    scan['languages'].update(other['languages'])
+    for signal in _FILE_FOLDS:
+        scan[signal.name] = signal.merge(scan[signal.name], other[signal.name])
+
+def scan_decided(scan):
+    """True once no further file can change the score contributed by `scan`."""
+    return (scan['file_count'] >= SCORE_THRESHOLDS['file_count'] and bool(scan['languages'])
+            and scan['has_tests'] and scan['readme_exists'] and scan['license_exists'])
+
+def scan_tree(repo_path, dir_cache=None, scoring=False, ignore=True):
+    """Walk the repository once with os.scandir and collect file signals.
+
+    `dir_cache` maps directory paths to (mtime_ns, local signals) and is updated in place.
+    With `scoring` the walk stops once scan_decided() holds.
+    """
+    scan = _new_scan()
+    seen = {}
+    visited = set()
+    root_rules = None
+    if ignore:
+        _, git_dir = resolve_git_dir(repo_path)
+        root_rules = ignore_rules.root_rules(repo_path, git_dir)
+
+    stack = [('', root_rules)]
+    while stack:
+        rel, rules = stack.pop()
+        path = os.path.join(repo_path, rel) if rel else repo_path
+        local = None
+        mtime_ns = None
+        if dir_cache is not None:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            cached = dir_cache.get(rel)
+            if cached and cached[0] == mtime_ns:
+                local = cached[1]
+                rules, local = _cached_rules(path, rel, rules, local)
+            # A directory modified within the last couple of seconds may change
+            # again without its mtime moving, so never trust it next time
+            if time.time_ns() - mtime_ns < 2 * 10**9:
+                mtime_ns = None
+        if local is None:
+            local, rules = _scan_dir(path, not rel, rel, rules)
+        seen[rel] = (mtime_ns, local)
+
+        _merge_scan(scan, local)
+        for name, dev, ino in local['subdirs']:
+            if (dev, ino) in visited:
+                continue
+            visited.add((dev, ino))
+            stack.append((f"{rel}/{name}" if rel else name, rules))
+        if scoring and scan_decided(scan):
+            break
+
+    if dir_cache is not None:
+        # An early stop saw only part of the tree, so keep the other entries
+        if not stack:
+            dir_cache.clear()
+        dir_cache.update(seen)
+    return scan
+
+def _cached_rules(path, rel, rules, local):
+    """Return (rules for the children, local), or (rules, None) if a cached directory must be relisted."""
+    parent_key, own_key = local.get('ignore') or ['', None]
+    if parent_key != (rules.key if rules is not None else ''):
+        return rules, None
+    if own_key is None:
+        return rules, local
+    child = rules.child(rel, ignore_rules.read_ignore_file(os.path.join(path, ignore_rules.GITIGNORE_FILE)))
+    return (child, local) if child.key == own_key else (rules, None)
+
+def iter_index_entries(repo_path, chunk_size=1 << 16):
+    """Yield (mode, path) bytes pairs from `git ls-files -z --stage`; returns False if git fails."""
+    return _iter_listing(repo_path, ['git', 'ls-files', '-z', '--stage'], chunk_size)
+
+def iter_tree_entries(repo_path, commit, chunk_size=1 << 16):
+    """Yield (mode and type, path) bytes pairs from `git ls-tree -r -z` of `commit`, like iter_index_entries."""
+    return _iter_listing(repo_path, ['git', 'ls-tree', '-r', '-z', '--full-tree', commit, '--'], chunk_size)
+
+def _iter_listing(repo_path, cmd, chunk_size):
+    records = iter_git_records(repo_path, cmd, chunk_size)
+    try:
+        while True:
+            try:
+                record = next(records)
+            except StopIteration as stop:
+                return stop.value
+            meta, _, path = record.partition(b'\t')
+            yield meta, path
+    finally:
+        records.close()
+
+def iter_git_records(repo_path, cmd, chunk_size=1 << 16, sep=b'\0', stdin=None):
+    """Yield the `sep`-terminated records a git command prints; returns False if git fails."""
+    profile_count('subprocesses')
+    try:
+        proc = subprocess.Popen(cmd, cwd=repo_path, env=_git_env(), stdout=subprocess.PIPE,
+                                stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL)
+    except OSError:
+        return False
+    if stdin is not None:
+        def feed():
+            try:
+                proc.stdin.write(stdin)
+                proc.stdin.close()
+            except OSError:
+                pass
+        threading.Thread(target=feed, daemon=True).start()
+    try:
+        pending = b''
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            records = (pending + chunk).split(sep)
+            pending = records.pop()
+            yield from records
+        return proc.wait() == 0
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+def scan_index(repo_path, scoring=False, ignore=True):
+    """Collect scan_tree's signals from the git index instead of the disk, or None if it cannot be read."""
+    rules = ignore_rules.evaluator_rules(repo_path) if ignore else None
+    return _scan_entries(iter_index_entries(repo_path), rules, scoring)
+
+def scan_commit(repo_path, commit='HEAD', scoring=False, ignore=True):
+    """Collect scan_index's signals from the tree of `commit`, or None if it cannot be listed."""
+    rules = commit_rules(repo_path, commit) if ignore else None
+    return _scan_entries(iter_tree_entries(repo_path, commit), rules, scoring)
+
+def commit_rules(repo_path, commit):
+    """The .evaluatorignore rules as committed in `commit`."""
+    commit = resolve_ref(repo_path, commit)
+    reader = object_reader(repo_path) if commit else None
+    obj = reader.read(f"{commit}:{ignore_rules.EVALUATOR_IGNORE_FILE}") if reader is not None else None
+    text = obj[1].decode('utf-8', 'surrogateescape') if obj is not None and obj[0] == 'blob' else ''
+    return ignore_rules.evaluator_rules(repo_path, text)
+
+def _path_filter(rules):
+    """Return counted(path), which tells whether a repository path ('/'-separated) is scanned."""
+    check = rules is not None and rules.active
+    pruned = {'': False}
+
+    def skip_dir(dirname):
+        skip = pruned.get(dirname)
+        if skip is None:
+            parent, _, part = dirname.rpartition('/')
+            skip = (skip_dir(parent) or part.startswith('.') or part in SKIP_DIRS
+                    or (check and rules.ignored(dirname, True)))
+            pruned[dirname] = skip
+        return skip
+
+    def counted(path):
+        dirname = path.rpartition('/')[0]
+        if dirname and skip_dir(dirname):
+            return False
+        return not (check and rules.ignored(path))
+
+    return counted
+
+# Bump when the shape of cached subtree signals changes
+SUBTREE_CACHE_VERSION = 1
+
+def scan_tree_objects(repo_path, commit='HEAD', cache=None, ignore=True):
+    """Collect scan_commit's signals from tree objects, caching each subtree's signals by SHA.
+
+    Returns None, caching nothing, if any tree cannot be read.
+    """
+    commit = resolve_ref(repo_path, commit)
+    reader = object_reader(repo_path) if commit else None
+    root = reader.read(f"{commit}^{{tree}}") if reader is not None else None
+    if root is None or root[0] != 'tree':
+        return None
+    oid_size = len(root[2]) // 2
+    prefix = f"{file_classifier.fingerprint()}:{signals_fingerprint()}:v{SUBTREE_CACHE_VERSION}:"
+    rules, rules_key = None, ''
+    if ignore:
+        for mode, name, oid in _tree_entries(root[1], oid_size):
+            if name == ignore_rules.EVALUATOR_IGNORE_FILE and mode != b'40000':
+                blob = reader.read(oid)
+                rules = ignore_rules.evaluator_rules(repo_path, blob[1].decode('utf-8', 'surrogateescape')
+                                                     if blob is not None else '')
+                rules_key = oid if rules.active else ''
+    check = rules is not None and rules.active
+
+    def key(oid, path):
+        return prefix + oid + (f":{rules_key}:{path}" if rules_key else '')
+
+    # Top-down: find the subtrees neither cached nor read yet, level by level
+    known = {}
+    levels = []
+    pending = {key(root[2], ''): ('', root[2])}
+    objects = {root[2]: root}
+    while pending:
+        if cache is not None:
+            known.update(cache.get_subtrees([k for k in pending if k not in known]))
+        missing = {k: node for k, node in pending.items() if k not in known}
+        objects.update(reader.read_many([oid for _, oid in missing.values() if oid not in objects]))
+        level, pending = [], {}
+        for k, (path, oid) in missing.items():
+            local, children = _new_scan(), []
+            obj = objects.pop(oid, None)
+            if obj is None or obj[0] != 'tree':
+                return None
+            profile_count('dirs_listed')
+            for mode, name, child in _tree_entries(obj[1], oid_size):
+                child_path = f"{path}/{name}" if path else name
+                if mode == b'40000':
+                    if (name.startswith('.') or name in SKIP_DIRS
+                            or (check and rules.ignored(child_path, True))):
+                        continue
+                    child_key = key(child, child_path)
+                    children.append(child_key)
+                    if child_key not in known:
+                        pending[child_key] = (child_path, child)
+                # Submodule gitlinks are separate repositories
+                elif mode != b'160000' and not (check and rules.ignored(child_path)):
+                    _add_file(local, name)
+            level.append((k, local, children))
+        levels.append(level)
+
+    # Bottom-up: each new subtree is its own files plus its children
+    computed = {}
+    for level in reversed(levels):
+        for k, local, children in level:
+            for child_key in children:
+                _merge_scan(local, known[child_key])
+            known[k] = computed[k] = local
+    if cache is not None and computed:
+        cache.put_subtrees(computed)
+    scan = _new_scan()
+    _merge_scan(scan, known[key(root[2], '')])
+    return scan
+
+def _scan_entries(entries, rules, scoring):
+    scan = _new_scan()
+    counted = _path_filter(rules)
+    visited = 0
+    while True:
+        try:
+            meta, path = next(entries)
+        except StopIteration as stop:
+            if not stop.value:
+                profile_count('files_visited', visited)
+                return None
+            break
+        # Skip submodule gitlinks; their contents are not part of this repository
+        if meta.startswith(b'160000'):
+            continue
+        visited += 1
+        path = path.decode('utf-8', 'surrogateescape')
+        if not counted(path):
+            continue
+        _add_file(scan, path.rpartition('/')[2])
+        if scoring and scan_decided(scan):
+            entries.close()
+            break
+    profile_count('files_visited', visited)
+    return scan
+
+def index_has_entries(repo_path):
+    """False if the checkout's index is missing or lists nothing, as before the first `git add`."""
+    git_dir, _ = resolve_git_dir(repo_path)
+    if git_dir is None:
+        return False
+    try:
+        with open(os.path.join(git_dir, 'index'), 'rb') as f:
+            header = f.read(12)
+            # The header is "DIRC", the version and the entry count
+            if header[:4] != b'DIRC' or int.from_bytes(header[8:12], 'big') > 0:
+                return True
+            # A split index keeps its entries in a shared file named by the 'link' extension
+            return b'link' in f.read()
+    except OSError:
+        return False
+
+def resolve_engine(repo_path, engine='auto', ref=None):
+    """Pick the scan engine: a `ref` or a bare repository reads a tree, a checkout its index
+    (or its working tree while nothing is staged)."""
+    if ref is not None:
+        return 'tree'
+    if engine == 'auto':
+        if os.path.exists(os.path.join(repo_path, '.git')):
+            return 'git' if index_has_entries(repo_path) else 'walk'
+        return 'tree' if is_bare_repo(repo_path) else 'walk'
+    return engine
+
+class FileMemo:
+    """Per-evaluation memo of directory listings and file chunks."""
+
+    checkout = True
+
+    def __init__(self, root, chunk_size=1 << 16):
+        self.root = root
+        self.chunk_size = chunk_size
+        self._listings = {}
+        self._chunks = {}
+
+    def listdir(self, rel=''):
+        """Names in a directory relative to the root (empty if unreadable)."""
+        names = self._listings.get(rel)
+        if names is None:
+            profile_count('dirs_listed')
+            try:
+                names = frozenset(os.listdir(os.path.join(self.root, rel)))
+            except OSError:
+                names = frozenset()
+            self._listings[rel] = names
+        return names
+
+    def exists(self, rel):
+        parent, _, name = rel.rpartition('/')
+        return name in self.listdir(parent)
+
+    def iter_chunks(self, rel):
+        """Yield a file's bytes chunk by chunk, replaying what was already read."""
+        chunks, done = self._chunks.get(rel, ([], False))
+        yield from chunks
+        if done:
+            return
+        try:
+            with open(os.path.join(self.root, rel), 'rb') as f:
+                f.seek(sum(len(chunk) for chunk in chunks))
+                while True:
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    profile_count('bytes_read', len(chunk))
+                    chunks.append(chunk)
+                    self._chunks[rel] = (chunks, False)
+                    yield chunk
+        except OSError:
+            pass
+        self._chunks[rel] = (chunks, True)
+
+    def read_bytes(self, rel, limit=1 << 20):
+        """Whole file contents, or None if it is larger than `limit`."""
+        data = bytearray()
+        for chunk in self.iter_chunks(rel):
+            data += chunk
+            if len(data) > limit:
+                return None
+        return bytes(data)
+
+class GitObjectReader:
+    """A long-lived `git cat-file --batch` process, shared between threads."""
+
+    # Requests go out in slices small enough never to fill git's stdin
+    # pipe, so writing ahead cannot deadlock against an unread reply
+    WRITE_AHEAD_BYTES = 1 << 15
+    # Larger blobs are truncated to this many bytes; trees always come whole
+    MAX_OBJECT_BYTES = 1 << 23
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self._lock = threading.Lock()
+        self._proc = None
+
+    def read_many(self, names):
+        """Return {name: (type, bytes, oid) or None} for object names such as '<commit>:README.md'."""
+        names = list(dict.fromkeys(names))
+        results = dict.fromkeys(names)
+        # cat-file takes one name per line
+        wanted = [name for name in names if '\n' not in name]
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._proc is None:
+                        profile_count('subprocesses')
+                        self._proc = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=self.repo_path,
+                                                      env=_git_env(), stdin=subprocess.PIPE,
+                                                      stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+                    self._exchange(wanted, results)
+                    return results
+                except (OSError, ValueError):
+                    self._close()
+        return results
+
+    def read(self, name):
+        return self.read_many([name])[name]
+
+    def _exchange(self, names, results):
+        stdin, stdout = self._proc.stdin, self._proc.stdout
+        start = 0
+        while start < len(names):
+            end, size = start, 0
+            while end < len(names) and (end == start or size < self.WRITE_AHEAD_BYTES):
+                size += len(names[end].encode('utf-8', 'surrogateescape')) + 1
+                end += 1
+            stdin.write(''.join(name + '\n' for name in names[start:end]).encode('utf-8', 'surrogateescape'))
+            stdin.flush()
+            for name in names[start:end]:
+                header = stdout.readline()
+                if not header:
+                    raise ValueError('cat-file exited')
+                fields = header.split()
+                # "<name> missing" or "<name> ambiguous"
+                if len(fields) != 3 or not fields[2].isdigit():
+                    continue
+                remaining = int(fields[2])
+                kept = stdout.read(min(remaining, self.MAX_OBJECT_BYTES) if fields[1] == b'blob' else remaining)
+                remaining -= len(kept)
+                while remaining > 0:
+                    skipped = stdout.read(min(remaining, 1 << 16))
+                    if not skipped:
+                        raise ValueError('cat-file exited')
+                    remaining -= len(skipped)
+                stdout.read(1)
+                profile_count('bytes_read', len(kept))
+                results[name] = (fields[1].decode(), kept, fields[0].decode())
+            start = end
+
+    def _close(self):
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            for pipe in (proc.stdin, proc.stdout):
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+MAX_OBJECT_READERS = 16
+_object_readers = OrderedDict()
+_object_readers_lock = threading.Lock()
+
+def object_reader(repo_path):
+    """The shared GitObjectReader for `repo_path`'s object store, or None outside a repository."""
+    _, common_dir = resolve_git_dir(repo_path)
+    if common_dir is None:
+        return None
+    key = os.path.realpath(common_dir)
+    with _object_readers_lock:
+        reader = _object_readers.get(key)
+        if reader is None:
+            reader = _object_readers[key] = GitObjectReader(repo_path)
+        _object_readers.move_to_end(key)
+        evicted = []
+        while len(_object_readers) > MAX_OBJECT_READERS:
+            evicted.append(_object_readers.popitem(last=False)[1])
+    for old in evicted:
+        old.close()
+    return reader
+
+@atexit.register
+def close_object_readers():
+    with _object_readers_lock:
+        readers = list(_object_readers.values())
+        _object_readers.clear()
+    for reader in readers:
+        reader.close()
+
+def _tree_entries(data, oid_size):
+    """Yield (mode, name, oid) for the entries of a raw tree object; mode stays bytes (b'40000' for trees)."""
+    pos = 0
+    while pos < len(data):
+        space = data.index(b' ', pos)
+        nul = data.index(b'\0', space)
+        yield data[pos:space], data[space + 1:nul].decode('utf-8', 'surrogateescape'), data[nul + 1:nul + 1 + oid_size].hex()
+        pos = nul + 1 + oid_size
+
+def _tree_names(data, oid_size):
+    """Entry names of a raw tree object."""
+    return [name for _, name, _ in _tree_entries(data, oid_size)]
+
+class ObjectMemo(FileMemo):
+    """FileMemo answered from a commit's tree through a GitObjectReader."""
+
+    def __init__(self, root, reader, commit, checkout=True, chunk_size=1 << 16):
+        super().__init__(root, chunk_size)
+        self.reader = reader
+        self.commit = commit
+        self.checkout = checkout
+
+    def prefetch(self, rels):
+        """Read the trees and blobs at `rels` together; later listdir/iter_chunks calls are served from memory."""
+        rels = [rel for rel in rels if rel not in self._listings and rel not in self._chunks]
+        if not rels:
+            return
+        objects = self.reader.read_many(f"{self.commit}:{rel}" for rel in rels)
+        for rel in rels:
+            obj = objects[f"{self.commit}:{rel}"]
+            kind, data, oid = obj if obj is not None else (None, b'', '')
+            self._listings[rel] = frozenset(_tree_names(data, len(oid) // 2)) if kind == 'tree' else frozenset()
+            if kind != 'tree':
+                chunks = [data[i:i + self.chunk_size] for i in range(0, len(data), self.chunk_size)]
+                self._chunks[rel] = (chunks, True)
+
+    def listdir(self, rel=''):
+        if rel not in self._listings:
+            profile_count('dirs_listed')
+            self.prefetch([rel])
+        return self._listings[rel]
+
+    def iter_chunks(self, rel):
+        if rel not in self._chunks:
+            self.prefetch([rel])
+        yield from self._chunks.get(rel, ([], True))[0]
+
+OBJECT_ID = re.compile(r'[0-9a-f]{40}|[0-9a-f]{64}')
+
+def resolve_ref(repo_path, ref=None):
+    """The commit SHA that `ref` (HEAD if None) names, or None.
+
+    Names resolve in `repo_path`'s own worktree; only SHAs go to the object
+    reader, which linked worktrees share.
+    """
+    if ref is None or ref == 'HEAD':
+        return read_head_sha(repo_path)
+    if ref.startswith('-') or resolve_git_dir(repo_path)[0] is None:
+        return None
+    if OBJECT_ID.fullmatch(ref):
+        reader = object_reader(repo_path)
+        obj = reader.read(f"{ref}^{{commit}}") if reader is not None else None
+        return obj[2] if obj is not None and obj[0] == 'commit' else None
+    stdout, _, returncode = run_command(['git', 'rev-parse', '--verify', '-q', f"{ref}^{{commit}}"], cwd=repo_path)
+    return stdout if returncode == 0 and OBJECT_ID.fullmatch(stdout) else None
+
+def open_memo(repo_path, engine='auto', ref=None):
+    """The memo content signals read through: the commit's tree via the object
+    store for the git and tree engines, the working tree otherwise (or if HEAD
+    is unborn)."""
+    engine = resolve_engine(repo_path, engine, ref)
+    if engine in ('git', 'tree'):
+        reader = object_reader(repo_path)
+        commit = resolve_ref(repo_path, ref) if reader is not None else None
+        if commit:
+            return ObjectMemo(repo_path, reader, commit, checkout=engine == 'git')
+    return FileMemo(repo_path)
+
+CI_FILES = ['.github/workflows', '.gitlab-ci.yml', '.travis.yml', 'Jenkinsfile', 'azure-pipelines.yml']
+README_FILES = ['README.md', 'readme.md', 'README.txt']
+# Everything the cheap and portfolio signals may look at, fetched in one go
+CONTENT_PATHS = ['', '.github', 'src/components', 'package.json'] + README_FILES
+
+def analyze_codebase(repo_path, dir_cache=None, engine='auto', scoring=False, cache=None,
+                     memo=None, contents=True, ref=None):
+    """Analyze the codebase structure.
+
+    `engine` is 'git', 'tree', 'walk' or 'auto' (see resolve_engine). With `contents=False`
+    the content signals are left to the caller.
+    """
+    memo = memo or open_memo(repo_path, engine, ref)
     analysis = {
         'has_ci_cd': False,
         'has_tests': False,
@@ -80,168 +1214,246 @@ def analyze_codebase(repo_path):
         'is_portfolio': False
     }
 
-    # Check for CI/CD files
-    ci_files = ['.github/workflows', '.gitlab-ci.yml', '.travis.yml', 'Jenkinsfile', 'azure-pipelines.yml']
-    for ci_file in ci_files:
-        if os.path.exists(os.path.join(repo_path, ci_file)):
-            analysis['has_ci_cd'] = True
-            break
+    # Cheap content signals (CI files) cost a directory listing at most
+    if contents:
+        analysis.update(collect_content_signals('cheap', repo_path, memo, cache, analysis))
 
-    # Check for test files
-    test_patterns = ['test', 'spec', '__tests__', 'tests']
-    for root, dirs, files in os.walk(repo_path):
-        for file in files:
-            if any(pattern in file.lower() for pattern in test_patterns):
-                analysis['has_tests'] = True
-                break
-        if analysis['has_tests']:
-            break
+    # Enumerate files once, collecting every signal in a single pruned pass
+    scan = None
+    engine = resolve_engine(repo_path, engine, ref)
+    if engine == 'tree':
+        # With a cache, unchanged subtrees come from it (shared across forks)
+        if cache is not None and hasattr(cache, 'get_subtrees'):
+            scan = scan_tree_objects(repo_path, ref or 'HEAD', cache)
+        if scan is None:
+            scan = scan_commit(repo_path, ref or 'HEAD', scoring)
+    elif engine == 'git':
+        scan = scan_index(repo_path, scoring)
+    # Either engine falls back to walking the files, unless there is no working tree to walk
+    if scan is None and engine != 'walk' and (ref is not None or is_bare_repo(repo_path)):
+        scan = _new_scan()
+    if scan is None:
+        scan = scan_tree(repo_path, dir_cache, scoring)
+    analysis['has_tests'] = scan['has_tests']
+    analysis['readme_exists'] = scan['readme_exists']
+    analysis['license_exists'] = scan['license_exists']
+    analysis['file_count'] = scan['file_count']
+    analysis['languages'] = scan['languages']
+    for signal in _FILE_FOLDS:
+        analysis[signal.name] = scan[signal.name]
 
-    # Check for README and LICENSE
-    for root, dirs, files in os.walk(repo_path):
-        for file in files:
-            if file.lower().startswith('readme'):
-                analysis['readme_exists'] = True
-            if file.lower().startswith('license') or file.lower() == 'license':
-                analysis['license_exists'] = True
-
-    # Count files and detect languages
-    for root, dirs, files in os.walk(repo_path):
-        # Skip .git, node_modules, etc.
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', 'venv', '__pycache__', 'build', 'dist']]
-        for file in files:
-            if not file.startswith('.'):
-                analysis['file_count'] += 1
-                ext = os.path.splitext(file)[1].lower()
-                if ext in ['.js', '.jsx', '.ts', '.tsx']:
-                    analysis['languages'].add('JavaScript/TypeScript')
-                elif ext in ['.py']:
-                    analysis['languages'].add('Python')
-                elif ext in ['.java']:
-                    analysis['languages'].add('Java')
-                elif ext in ['.cpp', '.c', '.h']:
-                    analysis['languages'].add('C/C++')
-                elif ext in ['.go']:
-                    analysis['languages'].add('Go')
-                elif ext in ['.rs']:
-                    analysis['languages'].add('Rust')
-
-    # Detect portfolio projects
-    analysis['is_portfolio'] = detect_portfolio(repo_path)
+    # Expensive content signals (coverage reports, portfolio) once the scan is in
+    if contents:
+        analysis.update(collect_content_signals('expensive', repo_path, memo, cache, analysis))
 
     return analysis
 
-def detect_portfolio(repo_path):
+PORTFOLIO_INDICATORS = [
+    'portfolio',
+    'personal-website',
+    'resume',
+    'cv',
+    'about',
+    'contact',
+    'hero',
+    'skills',
+    'projects',
+    'experience',
+    'education'
+]
+
+def _text_mentions(chunks, words):
+    """True once any of `words` appears in the streamed text, case-insensitively."""
+    overlap = max(len(word) for word in words) - 1
+    tail = ''
+    for chunk in chunks:
+        text = tail + chunk.decode('utf-8', 'replace').lower()
+        if any(word in text for word in words):
+            return True
+        tail = text[-overlap:]
+    return False
+
+def detect_portfolio(repo_path, memo=None):
     """Detect if this is a portfolio/personal website project."""
-    portfolio_indicators = [
-        'portfolio',
-        'personal-website',
-        'resume',
-        'cv',
-        'about',
-        'contact',
-        'hero',
-        'skills',
-        'projects',
-        'experience',
-        'education'
-    ]
+    memo = memo or FileMemo(repo_path)
 
     # Check package.json for portfolio keywords
-    package_json = os.path.join(repo_path, 'package.json')
-    if os.path.exists(package_json):
+    if memo.exists('package.json'):
         try:
-            with open(package_json, 'r') as f:
-                data = json.load(f)
-                name = data.get('name', '').lower()
-                description = data.get('description', '').lower()
-                if any(indicator in name or indicator in description for indicator in portfolio_indicators):
-                    return True
+            data = json.loads(memo.read_bytes('package.json'))
+            name = data.get('name', '').lower()
+            description = data.get('description', '').lower()
+            if any(indicator in name or indicator in description for indicator in PORTFOLIO_INDICATORS):
+                return True
         except:
             pass
 
     # Check for common portfolio file structure
-    components_dir = os.path.join(repo_path, 'src', 'components')
-    if os.path.exists(components_dir):
-        component_files = os.listdir(components_dir)
+    component_files = memo.listdir('src/components')
+    if component_files:
         portfolio_components = ['About', 'Contact', 'Hero', 'Skills', 'Projects', 'Experience', 'Education']
         matching_components = sum(1 for comp in portfolio_components if any(comp.lower() in f.lower() for f in component_files))
         if matching_components >= 4:  # If 4+ portfolio components exist
             return True
 
     # Check README for portfolio keywords
-    readme_files = ['README.md', 'readme.md', 'README.txt']
-    for readme in readme_files:
-        readme_path = os.path.join(repo_path, readme)
-        if os.path.exists(readme_path):
-            try:
-                with open(readme_path, 'r') as f:
-                    content = f.read().lower()
-                    if any(indicator in content for indicator in portfolio_indicators):
-                        return True
-            except:
-                pass
+    for readme in README_FILES:
+        if memo.exists(readme) and _text_mentions(memo.iter_chunks(readme), PORTFOLIO_INDICATORS):
+            return True
 
     return False
 
-def calculate_score(git_info, analysis):
-    """Calculate the repository score."""
-    score = 0
-    max_score = 100
+MAX_SCORE = 100
+PORTFOLIO_POINTS = 5
 
-    # Commit activity (20 points)
-    if git_info['commit_count'] >= 50:
-        score += 20
-    elif git_info['commit_count'] >= 20:
-        score += 15
-    elif git_info['commit_count'] >= 10:
-        score += 10
-    elif git_info['commit_count'] >= 5:
-        score += 5
+SIGNAL_SOURCES = ('git_log', 'git_refs', 'files', 'contents')
 
-    # Test coverage and quality (25 points)
-    if analysis['has_tests']:
-        score += 15
-        if analysis['test_coverage'] > 80:
-            score += 10
-        elif analysis['test_coverage'] > 50:
-            score += 5
+@dataclass(frozen=True)
+class Signal:
+    """One scoring signal: its `source`, how it is folded or collected, and its `score`.
 
-    # CI/CD (15 points)
-    if analysis['has_ci_cd']:
-        score += 15
+    'contents' signals call `collect(repo_path, memo, cache)`; folded values must be JSON-serialisable.
+    Cheap signals run before the shared passes, so only expensive ones may take `needed(details)`.
+    """
+    name: str
+    source: str
+    cost: str = 'cheap'
+    score: object = None
+    initial: object = None
+    fold: object = None
+    merge: object = None
+    collect: object = None
+    needed: object = None
+    default: object = None
 
-    # Documentation (10 points)
-    if analysis['readme_exists']:
-        score += 7
-    if analysis['license_exists']:
-        score += 3
+SIGNALS = {}
+_LOG_FOLDS = []
+_FILE_FOLDS = []
 
-    # Code quality and structure (15 points)
-    if analysis['file_count'] > 20:
-        score += 5
-    if len(analysis['languages']) > 0:
-        score += 5
-    if len(git_info['contributors']) > 1:
-        score += 5
+def register_signal(signal):
+    """Add a signal to the registry; it is collected by the existing passes, never a new one."""
+    # Nothing collects or folds refs beyond the built-in branch list
+    if signal.source == 'git_refs':
+        raise ValueError(f"Signal {signal.name}: the 'git_refs' source is reserved for built-ins")
+    return _register_signal(signal)
 
-    # Community and maintenance (10 points)
-    if len(git_info['branches']) > 1:
-        score += 5
-    if git_info['last_commit_date']:
+def _register_signal(signal):
+    if signal.source not in SIGNAL_SOURCES:
+        raise ValueError(f"Unknown signal source: {signal.source}")
+    if signal.name in SIGNALS:
+        raise ValueError(f"Signal already registered: {signal.name}")
+    if signal.source == 'files' and signal.fold and not signal.merge:
+        raise ValueError(f"File signal {signal.name} needs a merge function")
+    if signal.source == 'contents' and signal.cost == 'cheap' and signal.needed is not None:
+        raise ValueError(f"Cheap content signal {signal.name} runs before the passes and cannot take needed")
+    SIGNALS[signal.name] = signal
+    _LOG_FOLDS[:] = [s for s in SIGNALS.values() if s.source == 'git_log' and s.fold]
+    _FILE_FOLDS[:] = [s for s in SIGNALS.values() if s.source == 'files' and s.fold]
+    return signal
+
+def signals_fingerprint():
+    """Names of the folded signals, for keying cached pass results."""
+    return ','.join(s.name for s in _LOG_FOLDS + _FILE_FOLDS)
+
+def collect_content_signals(cost, repo_path, memo, cache, details, pool=None):
+    """Run the 'contents' signals of one cost class, in parallel when given a pool."""
+    signals = [s for s in SIGNALS.values() if s.source == 'contents' and s.cost == cost]
+    values = {}
+    runnable = []
+    for signal in signals:
+        values[signal.name] = signal.default
+        if signal.needed is None or signal.needed(details):
+            runnable.append(signal)
+    if pool is not None and len(runnable) > 1:
+        futures = {signal.name: _submit(pool, _collect_signal, signal, repo_path, memo, cache)
+                   for signal in runnable}
+        for name, future in futures.items():
+            values[name] = future.result()
+    else:
+        for signal in runnable:
+            values[signal.name] = _collect_signal(signal, repo_path, memo, cache)
+    return values
+
+def _collect_signal(signal, repo_path, memo, cache):
+    with profile_phase(f"signal:{signal.name}"):
+        return signal.collect(repo_path, memo, cache)
+
+def _score_commits(details):
+    commit_count = details['commit_count']
+    if commit_count >= SCORE_THRESHOLDS['commit_count']:
+        return 20
+    elif commit_count >= 20:
+        return 15
+    elif commit_count >= 10:
+        return 10
+    elif commit_count >= 5:
+        return 5
+    return 0
+
+def _score_coverage(details):
+    if not details['has_tests']:
+        return 0
+    if details['test_coverage'] > 80:
+        return 10
+    elif details['test_coverage'] > 50:
+        return 5
+    return 0
+
+def _score_contributors(details):
+    count = details.get('contributor_count', len(details['contributors']))
+    return 5 if count >= SCORE_THRESHOLDS['contributors'] else 0
+
+def _score_recency(details):
+    if details['last_commit_date']:
         try:
-            last_commit = datetime.strptime(git_info['last_commit_date'], '%Y-%m-%d')
-            days_since_last_commit = (datetime.now() - last_commit).days
+            # Dates are UTC days (see commit_date), so compare against today in UTC,
+            # or against the day a historical snapshot is scored as of
+            last_commit = datetime.strptime(details['last_commit_date'], '%Y-%m-%d').date()
+            as_of = details.get('as_of')
+            today = datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else datetime.now(timezone.utc).date()
+            days_since_last_commit = (today - last_commit).days
             if days_since_last_commit <= 30:
-                score += 5
+                return 5
         except:
             pass
+    return 0
 
+# Built-in signals; their collection is hand-written into get_git_info and
+# the tree scan, so they only declare their input and score here
+for _signal in [
+    # Commit activity (20 points)
+    Signal('commit_count', 'git_log', score=_score_commits),
+    # Test coverage and quality (25 points)
+    Signal('has_tests', 'files', score=lambda d: 15 if d['has_tests'] else 0),
+    Signal('test_coverage', 'contents', 'expensive', score=_score_coverage, default=0.0,
+           collect=lambda repo_path, memo, cache: (coverage_reports.ingest_coverage(repo_path, cache)
+                                                   if memo.checkout else 0.0),
+           needed=lambda d: d['has_tests']),
+    # CI/CD (15 points)
+    Signal('has_ci_cd', 'contents', 'cheap', score=lambda d: 15 if d['has_ci_cd'] else 0, default=False,
+           collect=lambda repo_path, memo, cache: any(memo.exists(ci_file) for ci_file in CI_FILES)),
+    # Documentation (10 points)
+    Signal('readme_exists', 'files', score=lambda d: 7 if d['readme_exists'] else 0),
+    Signal('license_exists', 'files', score=lambda d: 3 if d['license_exists'] else 0),
+    # Code quality and structure (15 points)
+    Signal('file_count', 'files', score=lambda d: 5 if d['file_count'] >= SCORE_THRESHOLDS['file_count'] else 0),
+    Signal('languages', 'files', score=lambda d: 5 if len(d['languages']) > 0 else 0),
+    Signal('contributors', 'git_log', score=_score_contributors),
+    # Community and maintenance (10 points)
+    Signal('branches', 'git_refs', score=lambda d: 5 if len(d['branches']) > 1 else 0),
+    Signal('last_commit_date', 'git_log', score=_score_recency),
     # Portfolio boost (5 points)
-    if analysis['is_portfolio']:
-        score += 5
+    Signal('is_portfolio', 'contents', 'expensive', score=lambda d: PORTFOLIO_POINTS if d['is_portfolio'] else 0,
+           default=False, collect=lambda repo_path, memo, cache: detect_portfolio(repo_path, memo))
+]:
+    _register_signal(_signal)
 
-    return min(score, max_score)
+def calculate_score(git_info, analysis):
+    """Calculate the repository score from every registered signal."""
+    details = dict(git_info)
+    details.update(analysis)
+    score = sum(signal.score(details) for signal in SIGNALS.values() if signal.score)
+    return min(score, MAX_SCORE)
 
 def get_rating(score):
     """Get rating based on score."""
@@ -265,8 +1477,418 @@ def get_recommendation(score, git_info, analysis):
     else:
         return "Poor repository. Significant improvements needed in multiple areas."
 
-def evaluate_repo(repo_path):
-    """Main evaluation function."""
+def read_head_sha(repo_path):
+    """Resolve HEAD to a commit SHA, reading .git directly when possible."""
+    git_dir, common_dir = resolve_git_dir(repo_path)
+    if git_dir is not None:
+        try:
+            with open(os.path.join(git_dir, 'HEAD'), 'r') as f:
+                head = f.read().strip()
+            if not head.startswith('ref: '):
+                return head
+            ref = head[5:]
+            ref_path = os.path.join(common_dir, ref)
+            if os.path.exists(ref_path):
+                with open(ref_path, 'r') as f:
+                    return f.read().strip()
+            with open(os.path.join(common_dir, 'packed-refs'), 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return parts[0]
+        except OSError:
+            pass
+
+    # In a bare repository with an unborn HEAD, plain `rev-parse HEAD` echoes the file name
+    stdout, _, returncode = run_command(['git', 'rev-parse', '--verify', '-q', 'HEAD^{commit}'], cwd=repo_path)
+    return stdout if returncode == 0 and stdout else None
+
+def git_cache_key(repo_path, ref=None):
+    """Build the get_git_info cache key: HEAD (or `ref`) plus a stamp of the branch refs."""
+    sha = resolve_ref(repo_path, ref)
+    if not sha:
+        return None
+    _, git_dir = resolve_git_dir(repo_path)
+    git_dir = git_dir or os.path.join(repo_path, '.git')
+    stamp = []
+    # The shallow file changes on deepen/unshallow even when HEAD does not
+    for path in [os.path.join(git_dir, 'packed-refs'), os.path.join(git_dir, 'shallow')]:
+        try:
+            stamp.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamp.append(0)
+    branches_dir = 'heads' if is_bare_repo(repo_path) else 'remotes'
+    for root, dirs, files in os.walk(os.path.join(git_dir, 'refs', branches_dir)):
+        try:
+            stamp.append(os.stat(root).st_mtime_ns)
+        except OSError:
+            pass
+    return f"{sha}:{hash(tuple(stamp)) & 0xffffffff:08x}"
+
+class EvaluationCache:
+    """Persistent SQLite cache for git info, file analyses and subtree signals, bounded by LRU eviction."""
+
+    def __init__(self, cache_dir=None, max_bytes=256 * 1024 * 1024, max_subtrees=1000000):
+        if cache_dir is None:
+            cache_dir = os.environ.get('EVALUATOR_CACHE_DIR') or os.path.join(
+                os.path.expanduser('~'), '.cache', 'repo-evaluator')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'evaluator-cache.sqlite3')
+        self.max_bytes = max_bytes
+        self.max_subtrees = max_subtrees
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS repos (repo TEXT PRIMARY KEY, accessed REAL, bytes INTEGER DEFAULT 0)')
+            conn.execute('CREATE TABLE IF NOT EXISTS git_info (repo TEXT PRIMARY KEY, key TEXT, data TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS analysis (repo TEXT PRIMARY KEY, key TEXT, data TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS dirs (repo TEXT, path TEXT, mtime_ns INTEGER, data TEXT, PRIMARY KEY (repo, path))')
+            conn.execute('CREATE TABLE IF NOT EXISTS coverage (digest TEXT PRIMARY KEY, percent REAL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS subtrees (key TEXT PRIMARY KEY, accessed REAL, data TEXT)')
+            conn.execute('CREATE INDEX IF NOT EXISTS subtrees_accessed ON subtrees (accessed)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _touch(self, conn, repo):
+        conn.execute('INSERT INTO repos (repo, accessed) VALUES (?, ?) '
+                     'ON CONFLICT(repo) DO UPDATE SET accessed = excluded.accessed', (repo, time.time()))
+
+    def _account(self, conn, repo):
+        """Refresh the stored size of `repo` and evict repos, `repo` itself last, while over budget."""
+        size = conn.execute('SELECT COALESCE(SUM(LENGTH(data)), 0) FROM dirs WHERE repo = ?', (repo,)).fetchone()[0]
+        size += conn.execute('SELECT COALESCE(SUM(LENGTH(data)), 0) FROM git_info WHERE repo = ?', (repo,)).fetchone()[0]
+        size += conn.execute('SELECT COALESCE(SUM(LENGTH(data)), 0) FROM analysis WHERE repo = ?', (repo,)).fetchone()[0]
+        conn.execute('UPDATE repos SET bytes = ? WHERE repo = ?', (size, repo))
+
+        total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM repos').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for victim, victim_bytes in conn.execute(
+                'SELECT repo, bytes FROM repos ORDER BY repo = ?, accessed', (repo,)).fetchall():
+            conn.execute('DELETE FROM dirs WHERE repo = ?', (victim,))
+            conn.execute('DELETE FROM git_info WHERE repo = ?', (victim,))
+            conn.execute('DELETE FROM analysis WHERE repo = ?', (victim,))
+            conn.execute('DELETE FROM repos WHERE repo = ?', (victim,))
+            total -= victim_bytes
+            if total <= self.max_bytes:
+                break
+
+    def get_git_info(self, repo, key):
+        """Return cached git info for `repo` if it was stored under `key`."""
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute('SELECT key, data FROM git_info WHERE repo = ?', (repo,)).fetchone()
+            if not row or row[0] != key:
+                return None
+            self._touch(conn, repo)
+        git_info = json.loads(row[1])
+        git_info['contributors'] = set(git_info['contributors'])
+        git_info['languages'] = set(git_info['languages'])
+        return git_info
+
+    def put_git_info(self, repo, key, git_info):
+        with closing(self._connect()) as conn, conn:
+            self._touch(conn, repo)
+            conn.execute('INSERT OR REPLACE INTO git_info (repo, key, data) VALUES (?, ?, ?)',
+                         (repo, key, json.dumps(to_json(git_info))))
+            self._account(conn, repo)
+
+    def get_analysis(self, repo, key):
+        """Return a cached index-based analysis for `repo` if it was stored under `key`."""
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute('SELECT key, data FROM analysis WHERE repo = ?', (repo,)).fetchone()
+            if not row or row[0] != key:
+                return None
+            self._touch(conn, repo)
+        analysis = json.loads(row[1])
+        analysis['languages'] = set(analysis['languages'])
+        return analysis
+
+    def put_analysis(self, repo, key, analysis):
+        with closing(self._connect()) as conn, conn:
+            self._touch(conn, repo)
+            conn.execute('INSERT OR REPLACE INTO analysis (repo, key, data) VALUES (?, ?, ?)',
+                         (repo, key, json.dumps(to_json(analysis))))
+            self._account(conn, repo)
+
+    def get_coverage(self, digest):
+        """Return the parsed percentage of a coverage report by content hash."""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT percent FROM coverage WHERE digest = ?', (digest,)).fetchone()
+        return row[0] if row else None
+
+    def put_coverage(self, digest, percent):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('INSERT OR REPLACE INTO coverage (digest, percent) VALUES (?, ?)', (digest, percent))
+
+    def get_subtrees(self, keys):
+        """Return {key: signals} for the subtrees in `keys` that are cached."""
+        found = {}
+        keys = list(keys)
+        with closing(self._connect()) as conn, conn:
+            # Stay under SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                marks = ','.join('?' * len(batch))
+                rows = conn.execute(f'SELECT key, data FROM subtrees WHERE key IN ({marks})', batch).fetchall()
+                if rows:
+                    conn.execute(f'UPDATE subtrees SET accessed = ? WHERE key IN ({marks})',
+                                 [time.time()] + [key for key, _ in rows])
+                for key, data in rows:
+                    signals = json.loads(data)
+                    signals['languages'] = set(signals['languages'])
+                    found[key] = signals
+        return found
+
+    def put_subtrees(self, subtrees):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany('INSERT OR REPLACE INTO subtrees (key, accessed, data) VALUES (?, ?, ?)',
+                             [(key, now, json.dumps(to_json(signals))) for key, signals in subtrees.items()])
+            excess = conn.execute('SELECT COUNT(*) FROM subtrees').fetchone()[0] - self.max_subtrees
+            if excess > 0:
+                conn.execute('DELETE FROM subtrees WHERE key IN '
+                             '(SELECT key FROM subtrees ORDER BY accessed LIMIT ?)', (excess,))
+
+    def get_dirs(self, repo):
+        """Load the per-directory scan cache for `repo` in the shape scan_tree expects."""
+        dir_cache = {}
+        with closing(self._connect()) as conn:
+            for path, mtime_ns, data in conn.execute(
+                    'SELECT path, mtime_ns, data FROM dirs WHERE repo = ?', (repo,)):
+                local = json.loads(data)
+                local['languages'] = set(local['languages'])
+                dir_cache[path] = (mtime_ns, local)
+        return dir_cache
+
+    def put_dirs(self, repo, old, new):
+        """Write back only the directories whose entry changed between `old` and `new`."""
+        removed = [(repo, path) for path in old if path not in new]
+        # A cache hit keeps the very same local dict; anything else was rescanned
+        changed = [(repo, path, mtime_ns, json.dumps(to_json(local)))
+                   for path, (mtime_ns, local) in new.items()
+                   if mtime_ns is None or path not in old or old[path][0] != mtime_ns or old[path][1] is not local]
+        with closing(self._connect()) as conn, conn:
+            self._touch(conn, repo)
+            if removed:
+                conn.executemany('DELETE FROM dirs WHERE repo = ? AND path = ?', removed)
+            if changed:
+                conn.executemany('INSERT OR REPLACE INTO dirs (repo, path, mtime_ns, data) VALUES (?, ?, ?, ?)', changed)
+            if removed or changed:
+                self._account(conn, repo)
+
+class MemoryCache:
+    """In-process LRU with the same interface as EvaluationCache, for the serve daemon."""
+
+    TABLES = ('git_info', 'analysis', 'dirs', 'coverage', 'subtrees')
+
+    def __init__(self, max_entries=1024, max_subtrees=None):
+        self.max_entries = max_entries
+        self.max_subtrees = max_subtrees or 256 * max_entries
+        self._tables = {name: OrderedDict() for name in self.TABLES}
+        self._hits = dict.fromkeys(self.TABLES, 0)
+        self._misses = dict.fromkeys(self.TABLES, 0)
+        self._lock = threading.Lock()
+
+    def _get(self, table, repo, key=None):
+        with self._lock:
+            entries = self._tables[table]
+            entry = entries.get(repo)
+            if entry is None or entry[0] != key:
+                self._misses[table] += 1
+                return None
+            entries.move_to_end(repo)
+            self._hits[table] += 1
+            return entry[1]
+
+    def _put(self, table, repo, key, value):
+        with self._lock:
+            entries = self._tables[table]
+            entries[repo] = (key, value)
+            entries.move_to_end(repo)
+            limit = self.max_subtrees if table == 'subtrees' else self.max_entries
+            while len(entries) > limit:
+                entries.popitem(last=False)
+
+    def get_git_info(self, repo, key):
+        return copy.deepcopy(self._get('git_info', repo, key))
+
+    def put_git_info(self, repo, key, git_info):
+        self._put('git_info', repo, key, copy.deepcopy(git_info))
+
+    def get_analysis(self, repo, key):
+        return copy.deepcopy(self._get('analysis', repo, key))
+
+    def put_analysis(self, repo, key, analysis):
+        self._put('analysis', repo, key, copy.deepcopy(analysis))
+
+    def get_coverage(self, digest):
+        return self._get('coverage', digest)
+
+    def put_coverage(self, digest, percent):
+        self._put('coverage', digest, None, percent)
+
+    def get_subtrees(self, keys):
+        found = {}
+        for key in keys:
+            signals = self._get('subtrees', key)
+            if signals is not None:
+                found[key] = signals
+        return found
+
+    def put_subtrees(self, subtrees):
+        for key, signals in subtrees.items():
+            self._put('subtrees', key, None, signals)
+
+    def get_dirs(self, repo):
+        # scan_tree never mutates the per-directory dicts, so they are shared
+        return dict(self._get('dirs', repo) or {})
+
+    def put_dirs(self, repo, old, new):
+        self._put('dirs', repo, None, dict(new))
+
+    def stats(self):
+        """Entries, hits, misses and hit rate per table."""
+        with self._lock:
+            report = {}
+            for table in self.TABLES:
+                hits, misses = self._hits[table], self._misses[table]
+                report[table] = {
+                    'entries': len(self._tables[table]),
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None
+                }
+            return report
+
+def cached_git_info(repo_path, cache, **git_options):
+    """get_git_info, served from `cache` while HEAD and remote refs are unchanged."""
+    key = git_cache_key(repo_path, git_options.get('ref'))
+    if key is None:
+        return get_git_info(repo_path, **git_options)
+    key += ''.join(f":{name}={value}" for name, value in sorted(git_options.items()))
+    key += f":{signals_fingerprint()}"
+    repo = os.path.realpath(repo_path)
+    git_info = cache.get_git_info(repo, key)
+    if git_info is None:
+        git_info = get_git_info(repo_path, **git_options)
+        cache.put_git_info(repo, key, git_info)
+    return git_info
+
+# Bump when the shape of cached _scan_dir results changes
+DIR_CACHE_VERSION = 3
+
+def index_cache_key(repo_path):
+    """Stamp of everything an index scan depends on: the index, .evaluatorignore and the rule tables."""
+    git_dir, _ = resolve_git_dir(repo_path)
+    if git_dir is None:
+        return None
+    stamp = []
+    for path in (os.path.join(git_dir, 'index'), os.path.join(repo_path, ignore_rules.EVALUATOR_IGNORE_FILE)):
+        try:
+            st = os.stat(path)
+            stamp.append(f"{st.st_mtime_ns}.{st.st_size}")
+        except OSError:
+            stamp.append('-')
+    # git rewrites the index in place, so a stamp taken within the same
+    # couple of seconds as the write may not see a later change
+    if stamp[0] != '-' and time.time_ns() - int(stamp[0].split('.')[0]) < 2 * 10**9:
+        return None
+    return ':'.join(stamp + [file_classifier.fingerprint(), signals_fingerprint()])
+
+def cached_analysis(repo_path, cache, engine='auto', scoring=False, **analysis_options):
+    """analyze_codebase, reusing results while the index, commit or directory mtimes are unchanged."""
+    engine = resolve_engine(repo_path, engine, analysis_options.get('ref'))
+    if engine in ('git', 'tree'):
+        key = None
+        if analysis_options.get('contents') is False:
+            if engine == 'git':
+                key = index_cache_key(repo_path)
+            else:
+                commit = resolve_ref(repo_path, analysis_options.get('ref'))
+                key = f"{commit}:{file_classifier.fingerprint()}:{signals_fingerprint()}" if commit else None
+        if key is None:
+            return analyze_codebase(repo_path, engine=engine, scoring=scoring, cache=cache, **analysis_options)
+        repo = f"{os.path.realpath(repo_path)}#{'index' if engine == 'git' else 'tree'}"
+        key += f":scoring={scoring}"
+        analysis = cache.get_analysis(repo, key)
+        if analysis is None:
+            analysis = analyze_codebase(repo_path, engine=engine, scoring=scoring, cache=cache, **analysis_options)
+            cache.put_analysis(repo, key, analysis)
+        return analysis
+    # Cached languages depend on the extension table, so key on it too
+    repo = (f"{os.path.realpath(repo_path)}#{file_classifier.fingerprint()}#{signals_fingerprint()}"
+            f"#v{DIR_CACHE_VERSION}")
+    old = cache.get_dirs(repo)
+    dir_cache = dict(old)
+    analysis = analyze_codebase(repo_path, dir_cache, engine, scoring, cache, **analysis_options)
+    cache.put_dirs(repo, old, dir_cache)
+    return analysis
+
+GITMODULES_PATH = re.compile(r'^\s*path\s*=\s*(.+?)\s*$', re.MULTILINE)
+
+def list_submodules(repo_path):
+    """Relative paths of the submodules in .gitmodules that are checked out."""
+    try:
+        with open(os.path.join(repo_path, '.gitmodules'), 'r', encoding='utf-8', errors='replace') as f:
+            paths = GITMODULES_PATH.findall(f.read())
+    except OSError:
+        return []
+    return [path for path in paths if os.path.exists(os.path.join(repo_path, path, '.git'))]
+
+def evaluate_submodules(repo_path, workers=4, _seen=None, **options):
+    """Evaluate each checked-out submodule, recursively and in parallel, as {path: result}."""
+    seen = _seen if _seen is not None else set()
+    try:
+        st = os.stat(repo_path)
+        seen.add((st.st_dev, st.st_ino))
+    except OSError:
+        return {}
+    paths = []
+    for path in list_submodules(repo_path):
+        try:
+            st = os.stat(os.path.join(repo_path, path))
+        except OSError:
+            continue
+        if (st.st_dev, st.st_ino) not in seen:
+            seen.add((st.st_dev, st.st_ino))
+            paths.append(path)
+    if not paths:
+        return {}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {path: _submit(pool, evaluate_repo, os.path.join(repo_path, path), **options) for path in paths}
+        for path, future in futures.items():
+            results[path] = result = future.result()
+            nested = evaluate_submodules(os.path.join(repo_path, path), workers, seen, **options)
+            if nested:
+                result['submodules'] = nested
+    return results
+
+def _phased(name, fn, *args, **kwargs):
+    with profile_phase(name):
+        return fn(*args, **kwargs)
+
+def evaluate_repo(repo_path, cache=None, engine='auto', scoring=False, profile=False, submodules=False,
+                  ref=None, file_signals=None, **git_options):
+    """Main evaluation function.
+
+    Other keyword arguments go to get_git_info. `scoring` lets collectors stop once the score
+    is decided, `ref` scores that revision from the object store, and `file_signals` reuses
+    the file signals of an identical tree.
+    """
+    if profile:
+        profiler = profile if isinstance(profile, Profiler) else Profiler()
+        token = _profiler.set(profiler)
+        try:
+            with profiler.phase('total'):
+                result = evaluate_repo(repo_path, cache, engine, scoring, submodules=submodules, ref=ref,
+                                       file_signals=file_signals, **git_options)
+        finally:
+            _profiler.reset(token)
+        result['profile'] = profiler.report()
+        return result
+
     if not os.path.exists(repo_path):
         return {
             'score': 0,
@@ -274,12 +1896,69 @@ def evaluate_repo(repo_path):
             'recommendation': 'Repository path does not exist',
             'details': {}
         }
+    if submodules:
+        result = evaluate_repo(repo_path, cache, engine, scoring, ref=ref, file_signals=file_signals,
+                               **git_options)
+        with profile_phase('submodules'):
+            result['submodules'] = evaluate_submodules(
+                repo_path, cache=cache, engine=engine, scoring=scoring, **git_options)
+        return result
+
+    commit = None
+    if ref is not None:
+        # Resolve once, so every collector reads the same commit
+        commit = resolve_ref(repo_path, ref)
+        if commit is None:
+            return {
+                'score': 0,
+                'rating': 'INVALID',
+                'recommendation': f"Ref {ref!r} does not name a commit",
+                'details': {}
+            }
+        git_options['ref'] = commit
+
+    memo = open_memo(repo_path, engine, commit)
+    if isinstance(memo, ObjectMemo):
+        with profile_phase('contents:prefetch'):
+            memo.prefetch(CONTENT_PATHS)
 
-    git_info = get_git_info(repo_path)
-    analysis = analyze_codebase(repo_path)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        # Cheap content signals first
+        with profile_phase('contents:cheap'):
+            contents = collect_content_signals('cheap', repo_path, memo, cache, {})
+
+        # git I/O and the filesystem scan are independent, so overlap them;
+        # every log and file signal rides on these two passes
+        analysis_future = None
+        if cache is not None:
+            git_future = _submit(pool, _phased, 'git', cached_git_info, repo_path, cache,
+                                 scoring=scoring, **git_options)
+            if file_signals is None:
+                analysis_future = _submit(pool, _phased, 'files', cached_analysis, repo_path, cache, engine,
+                                          scoring, memo=memo, contents=False, ref=commit)
+        else:
+            git_future = _submit(pool, _phased, 'git', get_git_info, repo_path, scoring=scoring, **git_options)
+            if file_signals is None:
+                analysis_future = _submit(pool, _phased, 'files', analyze_codebase, repo_path, None, engine,
+                                          scoring, memo=memo, contents=False, ref=commit)
+        git_info = git_future.result()
+        if analysis_future is not None:
+            analysis = analysis_future.result()
+        else:
+            analysis = copy.deepcopy(file_signals)
+        analysis.update(contents)
+
+        # Expensive content signals run in parallel, each only when needed()
+        details = dict(git_info)
+        details.update(analysis)
+        with profile_phase('contents:expensive'):
+            analysis.update(collect_content_signals('expensive', repo_path, memo, cache, details, pool))
 
     # Merge analysis into git_info
     git_info.update(analysis)
+    if ref is not None:
+        git_info['ref'] = ref
+        git_info['commit'] = commit
 
     score = calculate_score(git_info, analysis)
     rating = get_rating(score)
@@ -292,16 +1971,707 @@ def evaluate_repo(repo_path):
         'details': git_info
     }
 
+class _TreeCounts:
+    """File signals of one tree kept as counts, so diff-tree changes can be applied in both directions."""
+
+    def __init__(self):
+        self.tests = self.readmes = self.licenses = self.files = 0
+        self.languages = {}
+        # Registered file signals have no inverse, so they are refolded from the names
+        self.names = {} if _FILE_FOLDS else None
+
+    def update(self, path, delta):
+        name = path.rpartition('/')[2]
+        is_test, is_readme, is_license, language = file_classifier.classify(name)
+        self.tests += delta * is_test
+        self.readmes += delta * is_readme
+        self.licenses += delta * is_license
+        if not name.startswith('.'):
+            self.files += delta
+            if language:
+                self.languages[language] = self.languages.get(language, 0) + delta
+        if self.names is not None:
+            if delta > 0:
+                self.names[path] = name
+            else:
+                self.names.pop(path, None)
+
+    def scan(self):
+        scan = _new_scan()
+        scan.update(has_tests=self.tests > 0, readme_exists=self.readmes > 0, license_exists=self.licenses > 0,
+                    file_count=self.files, languages={lang for lang, n in self.languages.items() if n > 0})
+        for name in (self.names or {}).values():
+            for signal in _FILE_FOLDS:
+                scan[signal.name] = signal.fold(scan[signal.name], name)
+        return scan
+
+def _history_log(repo_path, commit, count, monthly):
+    """Walk the log once; return (snapshots as (sha, timestamp), commits first reachable from each)."""
+    records = iter_git_records(repo_path, ['git', 'log', '--topo-order', '--format=%H %P%x00%at%x00%an',
+                                           commit, '--'], sep=b'\n')
+    snapshots, buckets, months = [], [], set()
+    labels = {}
+    chain = commit
+    while True:
+        try:
+            record = next(records)
+        except StopIteration as stop:
+            if not stop.value:
+                return None
+            break
+        ids, _, rest = record.partition(b'\0')
+        timestamp, _, author = rest.partition(b'\0')
+        if not timestamp.isdigit():
+            continue
+        sha, *parents = ids.decode().split()
+        timestamp = int(timestamp)
+        label = labels.pop(sha, 0)
+        if sha == chain:
+            chain = parents[0] if parents else None
+            month = commit_date(timestamp)[:7]
+            if len(snapshots) < count and not (monthly and month in months):
+                months.add(month)
+                snapshots.append((sha, timestamp))
+                buckets.append({'commits': 0, 'first': None, 'last': None, 'authors': set(), 'log': []})
+                label = len(snapshots) - 1
+        bucket = buckets[label]
+        bucket['commits'] += 1
+        if bucket['first'] is None or timestamp < bucket['first']:
+            bucket['first'] = timestamp
+        if bucket['last'] is None or timestamp > bucket['last']:
+            bucket['last'] = timestamp
+        author = author.decode('utf-8', 'replace')
+        bucket['authors'].add(author)
+        if _LOG_FOLDS:
+            bucket['log'].append((commit_date(timestamp), author))
+        for parent in parents:
+            if labels.get(parent, -1) < label:
+                labels[parent] = label
+    return snapshots, buckets
+
+# Paths below these (and any root entry) can change what the content signals read
+_CONTENT_DIRS = tuple(path + '/' for path in CONTENT_PATHS if path)
+
+def _diff_groups(records):
+    """Group `git diff-tree --stdin -r -z` output into (commit, [(meta, path)]); unchanged pairs print nothing."""
+    current, changes, meta = None, [], None
+    for token in records:
+        if meta is not None:
+            changes.append((meta, token.decode('utf-8', 'surrogateescape')))
+            meta = None
+        elif token.startswith(b':'):
+            meta = token
+        elif token:
+            if current is not None:
+                yield current, changes
+            current, changes = token.decode(), []
+    if current is not None:
+        yield current, changes
+
+def _history_trees(repo_path, commits):
+    """Yield (commit, scan, contents_touched) for `commits`, oldest first, from one diff-tree process."""
+    def relist(commit):
+        counts, counted = _TreeCounts(), _path_filter(commit_rules(repo_path, commit))
+        for meta, path in iter_tree_entries(repo_path, commit):
+            path = path.decode('utf-8', 'surrogateescape')
+            if not meta.startswith(b'160000') and counted(path):
+                counts.update(path, 1)
+        return counts, counted
+
+    counts, counted = relist(commits[0])
+    yield commits[0], counts.scan(), True
+    if len(commits) == 1:
+        return
+    pairs = ''.join(f"{new} {old}\n" for old, new in zip(commits, commits[1:])).encode()
+    groups = _diff_groups(iter_git_records(repo_path, ['git', 'diff-tree', '--stdin', '-r', '-z', '--no-renames'],
+                                           stdin=pairs))
+    group = next(groups, None)
+    for commit in commits[1:]:
+        changes = []
+        if group is not None and group[0] == commit:
+            changes = group[1]
+            group = next(groups, None)
+        touched = rules_changed = False
+        for meta, path in changes:
+            old_mode, new_mode, _, _, status = meta[1:].split()
+            if '/' not in path or path.startswith(_CONTENT_DIRS):
+                touched = True
+            if path == ignore_rules.EVALUATOR_IGNORE_FILE:
+                rules_changed = True
+            # Edits keep the name; additions, deletions and type changes move
+            # the counts (gitlinks never count)
+            if status == b'M' or not counted(path):
+                continue
+            if old_mode not in (b'000000', b'160000'):
+                counts.update(path, -1)
+            if new_mode not in (b'000000', b'160000'):
+                counts.update(path, 1)
+        if rules_changed:
+            counts, counted = relist(commit)
+        yield commit, counts.scan(), touched
+
+def evaluate_history(repo_path, ref=None, count=10, monthly=False):
+    """Score the last `count` first-parent commits of `ref` (or months, with `monthly`) without a checkout."""
+    commit = resolve_ref(repo_path, ref) if resolve_git_dir(repo_path)[0] is not None else None
+    result = {'ref': ref or 'HEAD', 'commit': commit, 'series': []}
+    if commit is None or count < 1:
+        return result
+    with profile_phase('history:log'):
+        log = _history_log(repo_path, commit, count, monthly)
+    if log is None:
+        return result
+    snapshots, buckets = log
+    branches = {}
+    asyncio.run(_collect_branches(repo_path, branches, GIT_COMMAND_TIMEOUT))
+
+    reader = object_reader(repo_path)
+    content_signals = [s for s in SIGNALS.values() if s.source == 'contents']
+    commits = 0
+    first = last = None
+    authors = set()
+    folds = {signal.name: signal.initial for signal in _LOG_FOLDS}
+    contents = needs = None
+    trees = _history_trees(repo_path, [sha for sha, _ in reversed(snapshots)])
+    with profile_phase('history:snapshots'):
+        for (sha, timestamp), bucket, (_, scan, touched) in zip(reversed(snapshots), reversed(buckets), trees):
+            commits += bucket['commits']
+            first = bucket['first'] if first is None else min(first, bucket['first'])
+            last = bucket['last'] if last is None else max(last, bucket['last'])
+            authors |= bucket['authors']
+            for date, author in reversed(bucket['log']):
+                for signal in _LOG_FOLDS:
+                    folds[signal.name] = signal.fold(folds[signal.name], date, author)
+            details = {
+                'commit_count': commits,
+                'first_commit_date': commit_date(first),
+                'last_commit_date': commit_date(last),
+                'contributors': authors,
+                'contributor_count': len(authors),
+                'branches': branches['branches'],
+                'as_of': commit_date(timestamp),
+                **folds,
+                **scan
+            }
+            needed = tuple(s.needed is None or s.needed(details) for s in content_signals)
+            if touched or needed != needs:
+                memo = ObjectMemo(repo_path, reader, sha, checkout=False)
+                memo.prefetch(CONTENT_PATHS)
+                contents = collect_content_signals('cheap', repo_path, memo, None, details)
+                contents.update(collect_content_signals('expensive', repo_path, memo, None, details))
+                needs = needed
+            details.update(contents)
+            result['series'].append({'commit': sha, 'date': commit_date(timestamp),
+                                     'score': calculate_score(details, {})})
+    return result
+
+def to_json(value):
+    """Convert sets in an evaluation result into sorted lists for JSON."""
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    return value
+
+@dataclass(slots=True)
+class EvaluationRecord:
+    """Compact, JSON-ready summary of one evaluate_repo result."""
+    repo_path: str
+    score: int
+    rating: str
+    recommendation: str
+    commit_count: int = 0
+    first_commit_date: str = None
+    last_commit_date: str = None
+    contributor_count: int = 0
+    top_contributors: list = None
+    branch_count: int = 0
+    has_ci_cd: bool = False
+    has_tests: bool = False
+    test_coverage: float = 0.0
+    languages: list = field(default_factory=list)
+    file_count: int = 0
+    readme_exists: bool = False
+    license_exists: bool = False
+    is_portfolio: bool = False
+    clone: str = None
+    commit: str = None
+    estimated: list = field(default_factory=list)
+    submodules: list = None
+    profile: dict = None
+
+    @classmethod
+    def from_result(cls, repo_path, result):
+        details = result['details']
+        top = details.get('top_contributors')
+        return cls(
+            repo_path=repo_path,
+            score=result['score'],
+            rating=result['rating'],
+            recommendation=result['recommendation'],
+            commit_count=details.get('commit_count', 0),
+            first_commit_date=details.get('first_commit_date'),
+            last_commit_date=details.get('last_commit_date'),
+            contributor_count=details.get('contributor_count', len(details.get('contributors', ()))),
+            top_contributors=[list(pair) for pair in top] if top is not None else None,
+            branch_count=len(details.get('branches', ())),
+            has_ci_cd=details.get('has_ci_cd', False),
+            has_tests=details.get('has_tests', False),
+            test_coverage=details.get('test_coverage', 0.0),
+            languages=sorted(details.get('languages', ())),
+            file_count=details.get('file_count', 0),
+            readme_exists=details.get('readme_exists', False),
+            license_exists=details.get('license_exists', False),
+            is_portfolio=details.get('is_portfolio', False),
+            clone=details.get('clone'),
+            commit=details.get('commit'),
+            estimated=list(details.get('estimated', ())),
+            submodules=[cls.from_result(os.path.join(repo_path, path), sub).to_dict()
+                        for path, sub in result['submodules'].items()] if 'submodules' in result else None,
+            profile=result.get('profile')
+        )
+
+    def to_dict(self):
+        return asdict(self)
+
+@dataclass
+class HistoryRecord:
+    """JSON-ready score time series of one repository, from evaluate_history."""
+    repo_path: str
+    ref: str = None
+    commit: str = None
+    series: list = field(default_factory=list)
+    error: str = None
+
+    @classmethod
+    def from_result(cls, repo_path, result):
+        return cls(repo_path, result['ref'], result['commit'], result['series'])
+
+    def to_dict(self):
+        return asdict(self)
+
+def write_records(records, fmt, stream=None):
+    """Write records as they arrive: one object per line for 'ndjson', a streamed array for 'json'."""
+    stream = stream or sys.stdout
+    first = True
+    if fmt == 'json':
+        stream.write('[')
+    for record in records:
+        if fmt == 'json':
+            stream.write(('\n' if first else ',\n') + json.dumps(record.to_dict()))
+        else:
+            stream.write(json.dumps(record.to_dict()) + '\n')
+        stream.flush()
+        first = False
+    if fmt == 'json':
+        stream.write(']\n' if first else '\n]\n')
+        stream.flush()
+
+def _evaluate_for_batch(repo_path, options, file_signals=None, share=False):
+    """Process-pool entry point: evaluate one repo; with `share`, also return its file signals."""
+    try:
+        result = evaluate_repo(repo_path, file_signals=file_signals, **options)
+        record = EvaluationRecord.from_result(repo_path, result)
+    except Exception as e:
+        result, record = None, EvaluationRecord(repo_path, 0, 'ERROR', str(e))
+    if not share:
+        return record
+    if result is None or 'file_count' not in result['details']:
+        return record, None
+    return record, {s.name: result['details'][s.name] for s in SIGNALS.values() if s.source == 'files'}
+
+def batch_tree_key(repo_path, options):
+    """The tree SHA a batch evaluation of `repo_path` scans, or None unless its files come from a tree."""
+    try:
+        if resolve_engine(repo_path, options.get('engine', 'auto'), options.get('ref')) != 'tree':
+            return None
+        commit = resolve_ref(repo_path, options.get('ref'))
+        reader = object_reader(repo_path) if commit else None
+        obj = reader.read(f"{commit}^{{tree}}") if reader is not None else None
+    except Exception:
+        return None
+    return obj[2] if obj is not None and obj[0] == 'tree' else None
+
+def discover_repos(repos_from=None, root=None):
+    """Collect repository paths from a list file and/or the children of a root dir."""
+    repos = []
+    if repos_from:
+        with open(repos_from, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    repos.append(line)
+    if root:
+        for entry in sorted(os.scandir(root), key=lambda e: e.name):
+            if entry.is_dir() and not entry.name.startswith('.'):
+                repos.append(entry.path)
+    return repos
+
+def _history_for_batch(repo_path, options):
+    """Process-pool entry point for evaluate_history_batch."""
+    try:
+        return HistoryRecord.from_result(repo_path, evaluate_history(repo_path, **options))
+    except Exception as e:
+        return HistoryRecord(repo_path, error=str(e))
+
+def evaluate_batch(repo_paths, workers=None, **options):
+    """Evaluate many repositories in a process pool, yielding EvaluationRecords as they finish.
+
+    Repositories with the same tree share one file scan.
+    """
+    paths = iter(repo_paths)
+    limit = 2 * (workers or os.cpu_count() or 1)
+    signals = {}
+    waiting = {}
+    # Forked workers must not inherit this process's cat-file pipes
+    close_object_readers()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def submit(path, key):
+            if key is None:
+                pending[pool.submit(_evaluate_for_batch, path, options)] = ('record', None)
+            elif key in signals:
+                pending[pool.submit(_evaluate_for_batch, path, options, signals[key])] = ('record', None)
+            elif key in waiting:
+                waiting[key].append(path)
+            else:
+                waiting[key] = []
+                pending[pool.submit(_evaluate_for_batch, path, options, None, True)] = ('shared', key)
+
+        while True:
+            while len(pending) < limit:
+                path = next(paths, None)
+                if path is None:
+                    break
+                pending[pool.submit(batch_tree_key, path, options)] = ('key', path)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, value = pending.pop(future)
+                if kind == 'key':
+                    submit(value, future.result())
+                    continue
+                record = future.result()
+                if kind == 'shared':
+                    record, signals[value] = record
+                    for path in waiting.pop(value):
+                        submit(path, value)
+                yield record
+
+def evaluate_history_batch(repo_paths, workers=None, **options):
+    """evaluate_history for many repositories in a process pool, yielding HistoryRecords as they finish."""
+    close_object_readers()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_history_for_batch, path, options) for path in repo_paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+DEFAULT_SOCKET = os.environ.get('EVALUATOR_SOCKET') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'repo-evaluator', 'evaluator.sock')
+
+# evaluate_repo options a client may set; everything else stays with the daemon
+REMOTE_OPTIONS = ('engine', 'scoring', 'profile', 'submodules', 'ref', 'top_contributors', 'contributors',
+                  'contributor_threshold')
+
+# Unix sockets carry the daemon's requests; where Python has none (Windows),
+# only the daemon and its clients are unavailable
+UNIX_SOCKETS = hasattr(socket, 'AF_UNIX')
+
+if UNIX_SOCKETS:
+    class _PooledUnixServer(socketserver.UnixStreamServer):
+        """Unix socket server that hands each connection to a fixed thread pool."""
+
+        daemon_threads = True
+
+        def __init__(self, path, handler, workers):
+            super().__init__(path, handler)
+            self.pool = ThreadPoolExecutor(max_workers=workers)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._process, request, client_address)
+
+        def _process(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+        def server_close(self):
+            super().server_close()
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+class _EvaluatorHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line, one JSON response per line."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.respond(json.loads(line))
+            except Exception as e:
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+def serve(socket_path=DEFAULT_SOCKET, workers=8, cache_entries=1024):
+    """Run the evaluator daemon on a Unix socket until interrupted.
+
+    Requests are JSON lines with an 'op' of 'evaluate', 'stats' or 'shutdown'.
+    """
+    if not UNIX_SOCKETS:
+        raise RuntimeError('The evaluator daemon needs Unix sockets, which this platform lacks')
+    if os.path.lexists(socket_path):
+        # Only a stale socket is replaced; any other file is left alone
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            raise RuntimeError(f"{socket_path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            raise RuntimeError(f"An evaluator daemon is already listening on {socket_path}")
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+        finally:
+            probe.close()
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+
+    cache = MemoryCache(cache_entries)
+    counts = {'requests': 0, 'errors': 0}
+    counts_lock = threading.Lock()
+    started = time.time()
+    server = _PooledUnixServer(socket_path, _EvaluatorHandler, workers)
+
+    def respond(request):
+        op = request.get('op', 'evaluate')
+        if op == 'stats':
+            with counts_lock:
+                totals = dict(counts)
+            return {'uptime_s': round(time.time() - started, 1), 'workers': workers,
+                    **totals, 'caches': cache.stats()}
+        if op == 'shutdown':
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            return {'ok': True}
+        if op != 'evaluate':
+            raise ValueError(f"Unknown op: {op}")
+        with counts_lock:
+            counts['requests'] += 1
+        options = {name: request[name] for name in REMOTE_OPTIONS if name in request}
+        try:
+            return to_json(evaluate_repo(request['repo_path'], cache=cache, **options))
+        except Exception:
+            with counts_lock:
+                counts['errors'] += 1
+            raise
+
+    server.respond = respond
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+def _request(socket_path, request, timeout=GIT_COMMAND_TIMEOUT):
+    if not UNIX_SOCKETS:
+        raise RuntimeError('The evaluator daemon needs Unix sockets, which this platform lacks')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        conn.connect(socket_path)
+        conn.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with conn.makefile('rb') as f:
+            response = json.loads(f.readline())
+    if 'error' in response:
+        raise RuntimeError(response['error'])
+    return response
+
+def evaluate_remote(repo_path, socket_path=DEFAULT_SOCKET, **options):
+    """evaluate_repo through a running daemon; sets come back as sorted lists."""
+    request = {name: options[name] for name in REMOTE_OPTIONS if name in options}
+    request.update(op='evaluate', repo_path=os.path.abspath(repo_path))
+    return _request(socket_path, request)
+
+def server_stats(socket_path=DEFAULT_SOCKET):
+    """Request counts and per-table cache hit rates of a running daemon."""
+    return _request(socket_path, {'op': 'stats'})
+
+def evaluate_batch_remote(repo_paths, socket_path=DEFAULT_SOCKET, workers=None, **options):
+    """evaluate_batch through a daemon: concurrent requests, EvaluationRecords as they finish."""
+    def evaluate(path):
+        try:
+            return EvaluationRecord.from_result(path, evaluate_remote(path, socket_path, **options))
+        except Exception as e:
+            return EvaluationRecord(path, 0, 'ERROR', str(e))
+
+    with ThreadPoolExecutor(max_workers=workers or 8) as pool:
+        for future in as_completed([pool.submit(evaluate, path) for path in repo_paths]):
+            yield future.result()
+
+def _register_languages(parser, specs):
+    """Register each --language NAME=.EXT[,.EXT] spec with file_classifier."""
+    for spec in specs:
+        name, _, extensions = spec.partition('=')
+        if not name or not extensions:
+            parser.error(f"--language expects NAME=.EXT[,.EXT], got {spec!r}")
+        file_classifier.register_language(name, extensions.split(','))
+
+def _serve_main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog='evaluator.py serve', description='Run the evaluator daemon')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket path (default: $EVALUATOR_SOCKET)')
+    parser.add_argument('--workers', type=int, default=8, help='Requests evaluated concurrently')
+    parser.add_argument('--cache-entries', type=int, default=1024, help='Repositories kept per in-memory cache table')
+    parser.add_argument('--language', action='append', default=[], metavar='NAME=.EXT[,.EXT]',
+                        help='Register an extra language for detection (repeatable)')
+    args = parser.parse_args(argv)
+    if not UNIX_SOCKETS:
+        parser.error('serve needs Unix sockets, which this platform lacks')
+    _register_languages(parser, args.language)
+    try:
+        serve(args.socket, args.workers, args.cache_entries)
+    except RuntimeError as e:
+        parser.error(str(e))
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ['serve']:
+        _serve_main(sys.argv[2:])
+        sys.exit(0)
+
     import argparse
     parser = argparse.ArgumentParser(description='Evaluate a repository for SWE-Bench+ criteria')
-    parser.add_argument('--repo-path', required=True, help='Path to the repository')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--repo-path', help='Path to the repository')
+    target.add_argument('--repos-from', help='File listing one repository path per line (batch mode)')
+    target.add_argument('--root', help='Evaluate every subdirectory of this directory (batch mode)')
+    target.add_argument('--server-stats', action='store_true', help='Print the daemon\'s request and cache statistics')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for batch mode (default: CPU count)')
+    parser.add_argument('--engine', choices=['auto', 'git', 'tree', 'walk'], default='auto',
+                        help='File enumeration: git index, HEAD\'s tree, filesystem walk, or auto '
+                             '(git when .git has staged files, tree in a bare repository)')
+    parser.add_argument('--ref', metavar='REV',
+                        help='Score this revision from the object store, without a checkout (works on bare mirrors)')
+    parser.add_argument('--history', type=int, metavar='N',
+                        help='Output a score time series over the last N first-parent commits of --ref/HEAD')
+    parser.add_argument('--monthly', action='store_true',
+                        help='With --history, take the newest commit of each of the last N months')
+    parser.add_argument('--format', choices=['text', 'json', 'ndjson'], default=None,
+                        help='Output format (default: text for one repo, ndjson for batch mode)')
+    parser.add_argument('--top-contributors', type=int, default=0, metavar='N',
+                        help='Include the N authors with the most commits in the output '
+                             '(needs the full log: --contributors exact, without --scoring)')
+    parser.add_argument('--contributors', choices=CONTRIBUTOR_STRATEGIES, default='exact',
+                        help='Contributor counting: every name, stop at --contributor-threshold, or HyperLogLog estimate')
+    parser.add_argument('--contributor-threshold', type=int, default=2, metavar='N',
+                        help='Distinct authors after which threshold mode stops reading the log')
+    parser.add_argument('--scoring', action='store_true',
+                        help='Stop each collector once the score is decided (details become lower bounds)')
+    parser.add_argument('--language', action='append', default=[], metavar='NAME=.EXT[,.EXT]',
+                        help='Register an extra language for detection (repeatable), e.g. Kotlin=.kt,.kts')
+    parser.add_argument('--submodules', action='store_true',
+                        help='Also evaluate each checked-out submodule as a separate repository')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time each phase and count I/O; batch records carry the timings, '
+                             'and a p50/p99 summary is printed to stderr')
+    parser.add_argument('--server', nargs='?', const=DEFAULT_SOCKET, metavar='SOCKET',
+                        help='Send requests to a running `evaluator.py serve` daemon instead of evaluating here')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the on-disk evaluation cache')
+    parser.add_argument('--cache-dir', help='Cache directory (default: $EVALUATOR_CACHE_DIR or ~/.cache/repo-evaluator)')
+    parser.add_argument('--cache-max-mb', type=int, default=256, help='Evict least recently used repos beyond this size')
     args = parser.parse_args()
 
-    result = evaluate_repo(args.repo_path)
+    _register_languages(parser, args.language)
+
+    if (args.server or args.server_stats) and not UNIX_SOCKETS:
+        parser.error('--server and --server-stats need Unix sockets, which this platform lacks')
+    if args.server_stats:
+        print(json.dumps(server_stats(args.server or DEFAULT_SOCKET), indent=2))
+        sys.exit(0)
+
+    if args.monthly and not args.history:
+        parser.error('--monthly requires --history')
+    if args.top_contributors and (args.contributors != 'exact' or args.scoring):
+        parser.error('--top-contributors needs --contributors exact and no --scoring')
+    if args.history is not None:
+        if args.server:
+            parser.error('--history is not served by the daemon')
+        history_options = {'ref': args.ref, 'count': args.history, 'monthly': args.monthly}
+        if args.repo_path is None:
+            records = evaluate_history_batch(discover_repos(args.repos_from, args.root), args.workers,
+                                             **history_options)
+            write_records(records, 'json' if args.format == 'json' else 'ndjson')
+        elif args.format in ('json', 'ndjson'):
+            record = HistoryRecord.from_result(args.repo_path, evaluate_history(args.repo_path, **history_options))
+            print(json.dumps(record.to_dict(), indent=2 if args.format == 'json' else None))
+        else:
+            for point in evaluate_history(args.repo_path, **history_options)['series']:
+                print(f"{point['date']}  {point['commit'][:12]}  {point['score']:>3}/100")
+        sys.exit(0)
+
+    # A daemon keeps its own caches
+    cache = None if args.no_cache or args.server else EvaluationCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    options = {
+        'cache': cache,
+        'engine': args.engine,
+        'scoring': args.scoring,
+        'profile': args.profile,
+        'submodules': args.submodules,
+        'ref': args.ref,
+        'top_contributors': args.top_contributors,
+        'contributors': args.contributors,
+        'contributor_threshold': args.contributor_threshold
+    }
+
+    if args.repo_path is None:
+        # Batch mode: stream each record as soon as its repo finishes
+        repos = discover_repos(args.repos_from, args.root)
+        if args.server:
+            records = evaluate_batch_remote(repos, args.server, args.workers, **options)
+        else:
+            records = evaluate_batch(repos, args.workers, **options)
+        if args.profile:
+            profiles = []
+            records = (profiles.append(r.profile) or r for r in records)
+        write_records(records, 'json' if args.format == 'json' else 'ndjson')
+        if args.profile:
+            json.dump(profile_summary(p for p in profiles if p), sys.stderr, indent=2)
+            sys.stderr.write('\n')
+        sys.exit(0)
+
+    if args.server:
+        result = evaluate_remote(args.repo_path, args.server, **options)
+    else:
+        result = evaluate_repo(args.repo_path, **options)
+    if args.format in ('json', 'ndjson'):
+        record = EvaluationRecord.from_result(args.repo_path, result)
+        print(json.dumps(record.to_dict(), indent=2 if args.format == 'json' else None))
+        sys.exit(0)
+
     print(f"Score: {result['score']}/100")
     print(f"Rating: {result['rating']}")
     print(f"Recommendation: {result['recommendation']}")
     print("\nDetails:")
     for key, value in result['details'].items():
-        print(f"  {key}: {value}")
\ No newline at end of file
+        print(f"  {key}: {value}")
+
+    def print_submodules(submodules, indent):
+        for path, sub in submodules.items():
+            print(f"{indent}{path}: {sub['score']}/100 {sub['rating']}")
+            print_submodules(sub.get('submodules', {}), indent + '  ')
+
+    if result.get('submodules'):
+        print("\nSubmodules:")
+        print_submodules(result['submodules'], '  ')
+
+    if args.profile:
+        report = result['profile']
+        print("\nProfile:")
+        for name, seconds in sorted(report['phases'].items(), key=lambda item: -item[1]):
+            print(f"  {name:<24} {seconds * 1000:>10.2f} ms")
+        for name, n in report['counters'].items():
+            print(f"  {name:<24} {n:>10}")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+File name classifier for the repository evaluator
+Data-driven language, test, README and LICENSE detection
+"""
+
+import re
+import hashlib
+
+_EXTENSIONS = {
+    '.js': 'JavaScript/TypeScript',
+    '.jsx': 'JavaScript/TypeScript',
+    '.ts': 'JavaScript/TypeScript',
+    '.tsx': 'JavaScript/TypeScript',
+    '.py': 'Python',
+    '.java': 'Java',
+    '.cpp': 'C/C++',
+    '.c': 'C/C++',
+    '.h': 'C/C++',
+    '.go': 'Go',
+    '.rs': 'Rust'
+}
+
+# One search answers all three questions for nearly every name: the leftmost
+# hit is either a README/LICENSE prefix or 'test'/'spec' anywhere ('tests'
+# and '__tests__' contain 'test')
+NAME_PATTERN = re.compile(r'(?P<test>test|spec)|^(?P<readme>readme)|^(?P<license>license)', re.IGNORECASE)
+
+def register_language(language, extensions):
+    """Map additional extensions (with or without the leading dot) to `language`."""
+    for ext in extensions:
+        ext = ext.lower()
+        _EXTENSIONS[ext if ext.startswith('.') else '.' + ext] = language
+
+def fingerprint():
+    """Short digest of the extension table, for keying cached classifications."""
+    digest = hashlib.sha1(repr(sorted(_EXTENSIONS.items())).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+def language_for(name):
+    """Return the language of a file name, or None if its extension is unknown."""
+    dot = name.rfind('.')
+    # Like os.path.splitext, a leading dot does not start an extension
+    if dot <= 0:
+        return None
+    return _EXTENSIONS.get(name[dot:].lower())
+
+def classify(name):
+    """Return (is_test, is_readme, is_license, language) for a file name."""
+    match = NAME_PATTERN.search(name)
+    if match is None:
+        return False, False, False, language_for(name)
+    kind = match.lastgroup
+    if kind == 'test':
+        return True, False, False, language_for(name)
+    # A README/LICENSE prefix matched first; look for a test marker after it
+    is_test = NAME_PATTERN.search(name, match.end()) is not None
+    return is_test, kind == 'readme', kind == 'license', language_for(name)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Ignore rules for the repository evaluator's codebase scan
+Compiles .gitignore, .git/info/exclude and .evaluatorignore patterns once
+per directory level and answers "is this path ignored?" with git's rules
+"""
+
+import os
+import re
+import hashlib
+from functools import lru_cache
+
+# Evaluator-only patterns at the repository root, in .gitignore syntax.
+# They take precedence over git's files and apply to both scan engines.
+EVALUATOR_IGNORE_FILE = '.evaluatorignore'
+GITIGNORE_FILE = '.gitignore'
+
+# POSIX classes git's wildmatch accepts inside brackets, as regex set members
+_POSIX_CLASSES = {
+    'alnum': 'a-zA-Z0-9',
+    'alpha': 'a-zA-Z',
+    'blank': ' \\t',
+    'cntrl': '\\x00-\\x1f\\x7f',
+    'digit': '0-9',
+    'graph': '\\x21-\\x7e',
+    'lower': 'a-z',
+    'print': '\\x20-\\x7e',
+    'punct': '\\x21-\\x2f\\x3a-\\x40\\x5b-\\x60\\x7b-\\x7e',
+    'space': ' \\t\\n\\r\\f\\v',
+    'upper': 'A-Z',
+    'xdigit': '0-9A-Fa-f'
+}
+
+def _bracket(glob, i):
+    """Translate the bracket expression starting at glob[i] as git's wildmatch reads it.
+
+    Returns (regex, index after the closing ']'). Raises ValueError where
+    git aborts the match (no closing ']', an unknown [:class:]), since
+    such a pattern can never match anything.
+    """
+    n = len(glob)
+    i += 1
+    negate = i < n and glob[i] in '!^'
+    if negate:
+        i += 1
+    members = []
+    prev = None
+    first = True
+    while True:
+        if i >= n:
+            raise ValueError('unterminated character class')
+        c = glob[i]
+        if c == ']' and not first:
+            break
+        first = False
+        if c == '\\':
+            i += 1
+            if i >= n:
+                raise ValueError('trailing backslash in character class')
+            prev = glob[i]
+            members.append(re.escape(prev))
+        elif c == '-' and prev is not None and i + 1 < n and glob[i + 1] != ']':
+            i += 1
+            if glob[i] == '\\':
+                i += 1
+                if i >= n:
+                    raise ValueError('trailing backslash in character class')
+            # A reversed range like z-a matches nothing beyond its first character
+            if prev <= glob[i]:
+                members.append(f"{re.escape(prev)}-{re.escape(glob[i])}")
+            prev = None
+        elif c == '[' and glob.startswith(':', i + 1):
+            end = glob.find(']', i + 2)
+            if end == -1:
+                raise ValueError('unterminated character class')
+            if end == i + 2 or glob[end - 1] != ':':
+                # Not a [:class:]; the '[' is an ordinary member
+                prev = c
+                members.append(re.escape(c))
+            else:
+                name = glob[i + 2:end - 1]
+                if name not in _POSIX_CLASSES:
+                    raise ValueError(f"unknown character class {name!r}")
+                members.append(_POSIX_CLASSES[name])
+                prev = None
+                i = end
+        else:
+            prev = c
+            members.append(re.escape(c))
+        i += 1
+    # Like '?', a class never matches the '/' between path components
+    if negate:
+        return '[^/' + ''.join(members) + ']', i + 1
+    return '(?!/)[' + ''.join(members) + ']', i + 1
+
+def _translate(glob):
+    """Translate a gitignore glob (without anchoring or a trailing slash) into a regex body."""
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob.startswith('**', i):
+                leading = i == 0 or glob[i - 1] == '/'
+                trailing = i + 2 == n or glob[i + 2] == '/'
+                if leading and trailing:
+                    if i + 2 == n:
+                        out.append('.*')        # "a/**" matches everything inside a
+                        i += 2
+                    else:
+                        out.append('(?:.*/)?')  # "**/" matches zero or more directories
+                        i += 3
+                    continue
+            while i < n and glob[i] == '*':
+                i += 1
+            out.append('[^/]*')
+            continue
+        if c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            source, i = _bracket(glob, i)
+            out.append(source)
+            continue
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+def parse_pattern(line):
+    """Return (regex source, negate, dir_only) for one ignore-file line, or None if it has no pattern.
+
+    Lines git could never match (a malformed character class) are None too.
+    """
+    if line.startswith('#'):
+        return None
+    # Trailing spaces are dropped unless escaped
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    # A slash anywhere but the end anchors the pattern to its file's directory
+    try:
+        if '/' in line:
+            source = _translate(line.lstrip('/'))
+        else:
+            source = '(?:.*/)?' + _translate(line)
+        re.compile(source)
+    except (ValueError, re.error):
+        return None
+    return source, negate, dir_only
+
+@lru_cache(maxsize=1024)
+def compile_rules(text):
+    """Compile the lines of an ignore file; cached by content, so shared templates compile once.
+
+    Returns (any_regex, dir_regex, ordered) where `ordered` is None when
+    no line is negated: then one combined regex per kind decides. With
+    negations `ordered` lists (regex, negate, dir_only) and the last match
+    wins, as in git.
+    """
+    parsed = [p for p in (parse_pattern(line) for line in text.splitlines()) if p]
+    if not parsed:
+        return None
+    if any(negate for _, negate, _ in parsed):
+        return None, None, [(re.compile(src + r'\Z', re.DOTALL), negate, dir_only)
+                            for src, negate, dir_only in parsed]
+    files = [src for src, _, dir_only in parsed if not dir_only]
+    every = [src for src, _, _ in parsed]
+    any_re = re.compile('(?:' + '|'.join(files) + r')\Z', re.DOTALL) if files else None
+    dir_re = re.compile('(?:' + '|'.join(every) + r')\Z', re.DOTALL)
+    return any_re, dir_re, None
+
+def _decide(compiled, path, is_dir):
+    """True/False if a rule in `compiled` matches `path`, None if none does."""
+    any_re, dir_re, ordered = compiled
+    if ordered is None:
+        regex = dir_re if is_dir else any_re
+        return True if regex is not None and regex.match(path) else None
+    for regex, negate, dir_only in reversed(ordered):
+        if (is_dir or not dir_only) and regex.match(path):
+            return not negate
+    return None
+
+class IgnoreRules:
+    """One level of ignore rules plus the levels above it.
+
+    `base` is the level's directory relative to the repository root
+    ('' or ending in '/'). Deeper levels take precedence over their
+    parents, and `override` (the root .evaluatorignore) over all of them.
+    `key` identifies the whole chain, for validating cached scan results.
+    """
+
+    __slots__ = ('parent', 'base', 'compiled', 'override', 'key')
+
+    def __init__(self, parent=None, base='', compiled=None, override=None, key=''):
+        self.parent = parent
+        self.base = base
+        self.compiled = compiled
+        self.override = override
+        self.key = key
+
+    @property
+    def active(self):
+        return self.compiled is not None or self.parent is not None or self.override is not None
+
+    def child(self, rel, text):
+        """Rules for directory `rel` holding an ignore file with `text`."""
+        compiled = compile_rules(text)
+        if compiled is None:
+            return self
+        base = rel + '/' if rel else ''
+        key = hashlib.sha1(f"{self.key}\0{base}\0{text}".encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+        return IgnoreRules(self if self.active else None, base, compiled, self.override, key)
+
+    def ignored(self, path, is_dir=False):
+        """Whether `path` (relative to the repository root, '/'-separated) is ignored."""
+        if self.override is not None:
+            decision = _decide(self.override, path, is_dir)
+            if decision is not None:
+                return decision
+        level = self
+        while level is not None:
+            if level.compiled is not None and path.startswith(level.base):
+                decision = _decide(level.compiled, path[len(level.base):], is_dir)
+                if decision is not None:
+                    return decision
+            level = level.parent
+        return False
+
+def read_ignore_file(path):
+    """Text of an ignore file, or '' if it cannot be read."""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            return f.read()
+    except OSError:
+        return ''
+
+def root_rules(repo_path, git_dir=None):
+    """Rules in force before any .gitignore: .git/info/exclude and the evaluator's own file."""
+    exclude = read_ignore_file(os.path.join(git_dir, 'info', 'exclude')) if git_dir else ''
+    evaluator = read_ignore_file(os.path.join(repo_path, EVALUATOR_IGNORE_FILE))
+    override = compile_rules(evaluator)
+    key = hashlib.sha1(f"{exclude}\0{evaluator}".encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+    return IgnoreRules(None, '', compile_rules(exclude), override, key)
+
+def evaluator_rules(repo_path, text=None):
+    """Only the .evaluatorignore rules, for scans (like the git index) that git has already filtered.
+
+    `text` is the file's contents when it comes from a commit rather than the working tree.
+    """
+    if text is None:
+        text = read_ignore_file(os.path.join(repo_path, EVALUATOR_IGNORE_FILE))
+    override = compile_rules(text)
+    return IgnoreRules(None, '', None, override, '')